@@ -0,0 +1,32 @@
+TASK_STATUSES = ["OPEN", "IN_PROGRESS", "COMPLETE"]
+BOARD_STATUSES = ["OPEN", "CLOSED"]
+
+
+def empty_team_stats() -> dict:
+    """The aggregates of a team without boards."""
+    return {
+        "board_counts": dict.fromkeys(BOARD_STATUSES, 0),
+        "task_counts": dict.fromkeys(TASK_STATUSES, 0),
+        "user_counts": {}
+    }
+
+
+def move_count(counts: dict, old_status, new_status: str) -> dict:
+    """A copy of per-status counters with one item moved from `old_status` (None for a new item) to `new_status`."""
+    counts = dict(counts)
+    if old_status:
+        counts[old_status] -= 1
+    counts[new_status] += 1
+    return counts
+
+
+def count_user_task(user_counts: dict, user_id: str, old_status, new_status: str) -> dict:
+    """
+    A copy of per-user {"assigned": n, "completed": n} counters after a task of the user moved from `old_status`
+    (None for a new task) to `new_status`.
+    """
+    counts = dict(user_counts.get(user_id) or {"assigned": 0, "completed": 0})
+    if not old_status:
+        counts["assigned"] += 1
+    counts["completed"] += (new_status == "COMPLETE") - (old_status == "COMPLETE")
+    return {**user_counts, user_id: counts}
@@ -0,0 +1,206 @@
+"""
+Time every manager API on generated data sets of increasing size and report ops/sec and latency percentiles.
+
+For every size a fresh data set of that many users (and the teams, boards and tasks of generate_data) is generated
+and loaded, then each API is called with prepared JSON requests. The write APIs create their own entities, so the
+runs of the later APIs build on them: the boards made by create_board get a task each from add_task, which
+update_task_status completes so that close_board can close them, and remove_users_from_team removes some of the
+users add_users_to_team added to the teams made by create_team.
+
+The read APIs are called with sampled ids that repeat, so the response cache is disabled by default and every call
+is timed cold. --response-cache N times them with a cache of N entries instead, the size is recorded in the results.
+
+The results are written as JSON, and a previous results file can be given to compare the throughput of two commits.
+
+Usage: python -m benchmarks.api_throughput [--sizes 1000 10000 100000 1000000] [--ops 1000] [--response-cache 0]
+                                           [--output results.json] [--compare old_results.json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from benchmarks.generate_data import generate, CREATION_TIME
+from data_store import DataStore
+from user_manager import UserManager
+from team_manager import TeamManager
+from project_board_manager import ProjectBoardManager
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def time_calls(method, requests: list) -> dict:
+    latencies = []
+    errors = 0
+    for request in requests:
+        start = time.perf_counter()
+        response = method(*request)
+        latencies.append(time.perf_counter() - start)
+        if response.startswith('{"error"'):
+            errors += 1
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        "ops": len(latencies),
+        "ops_per_sec": len(latencies) / total if total else None,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": errors
+    }
+
+
+def run_size(size: int, ops: int, directory: str, seed: int, response_cache_size: int = 0) -> dict:
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    # export_board writes to out/ relative to the working directory
+    os.chdir(directory)
+
+    start = time.perf_counter()
+    store = DataStore("db")
+    ids = generate(store, size, seed=seed)
+    store.close()
+    generate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = DataStore("db", response_cache_size=response_cache_size)
+    load_time = time.perf_counter() - start
+
+    users, teams, boards = UserManager(store), TeamManager(store), ProjectBoardManager(store)
+    rng = random.Random(seed)
+    # The full listings get fewer calls, each one reads the whole collection
+    list_ops = max(3, ops // 100)
+
+    def request(**data) -> tuple:
+        return json.dumps(data),
+
+    def created_ids(responses) -> list:
+        return [json.loads(response)["id"] for response in responses]
+
+    def sample(values: list, count: int) -> list:
+        return [values[rng.randrange(len(values))] for _ in range(count)]
+
+    results = {"generate_s": generate_time, "load_s": load_time, "apis": {}}
+
+    def bench(name: str, method, requests: list):
+        responses = []
+
+        def call(*args):
+            responses.append(method(*args))
+            return responses[-1]
+        results["apis"][name] = time_calls(call, requests)
+        return responses
+
+    new_users = created_ids(bench("create_user", users.create_user, [
+        request(name=f"bench_user{k}", display_name=f"Bench user {k}", creation_time=CREATION_TIME)
+        for k in range(ops)]))
+    bench("describe_user", users.describe_user, [request(id=user_id) for user_id in sample(ids["users"], ops)])
+    bench("update_user", users.update_user, [request(id=user_id, user={"display_name": "Renamed"})
+                                             for user_id in sample(ids["users"], ops)])
+    bench("list_users", users.list_users, [() for _ in range(list_ops)])
+    bench("get_user_teams", users.get_user_teams, [request(id=user_id) for user_id in sample(ids["users"], ops)])
+
+    new_teams = created_ids(bench("create_team", teams.create_team, [
+        request(name=f"bench_team{k}", description="Benchmark team", admin=new_users[k], creation_time=CREATION_TIME)
+        for k in range(ops)]))
+    added_users = {team_id: sample(ids["users"], 5) for team_id in new_teams}
+    bench("add_users_to_team", teams.add_users_to_team, [request(id=team_id, users=added_users[team_id])
+                                                         for team_id in new_teams])
+    bench("update_team", teams.update_team, [request(id=team_id, team={"description": "Updated benchmark team"})
+                                             for team_id in new_teams])
+    bench("describe_team", teams.describe_team, [request(id=team_id) for team_id in sample(ids["teams"], ops)])
+    bench("list_team_users", teams.list_team_users, [request(id=team_id) for team_id in sample(ids["teams"], ops)])
+    bench("list_teams", teams.list_teams, [() for _ in range(list_ops)])
+    bench("remove_users_from_team", teams.remove_users_from_team, [request(id=team_id, users=added_users[team_id][:2])
+                                                                   for team_id in new_teams])
+
+    new_boards = created_ids(bench("create_board", boards.create_board, [
+        request(name=f"bench_board{k}", description="Benchmark board", team_id=new_teams[k],
+                creation_time=CREATION_TIME) for k in range(ops)]))
+    new_tasks = created_ids(bench("add_task", boards.add_task, [
+        request(title="Benchmark task", description="Benchmark task", user_id=new_users[k], board_id=board_id)
+        for k, board_id in enumerate(new_boards)]))
+    bench("update_task_status", boards.update_task_status, [request(id=task_id, status="COMPLETE")
+                                                            for task_id in new_tasks])
+    bench("describe_board", boards.describe_board, [request(id=board_id) for board_id in sample(ids["boards"], ops)])
+    bench("board_stats", boards.board_stats, [request(id=board_id) for board_id in sample(ids["boards"], ops)])
+    bench("team_stats", boards.team_stats, [request(id=team_id) for team_id in sample(ids["teams"], ops)])
+    bench("list_tasks", boards.list_tasks, [request(user_id=user_id) for user_id in sample(ids["users"], ops)])
+    bench("search_tasks", boards.search_tasks, [request(query=f"task{rng.randrange(size)}") for _ in range(ops)])
+    bench("list_boards", boards.list_boards, [request(id=team_id) for team_id in sample(ids["teams"], ops)])
+    bench("close_board", boards.close_board, [request(id=board_id) for board_id in new_boards])
+    bench("export_board", boards.export_board, [request(id=board_id)
+                                                for board_id in sample(ids["boards"], max(3, ops // 10))])
+
+    store.close()
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def print_results(results: dict, baseline: dict = None):
+    if baseline and baseline.get("response_cache_size", 0) != results["response_cache_size"]:
+        print(f"Warning: the response cache had {results['response_cache_size']} entries in this run and "
+              f"{baseline.get('response_cache_size', 0)} in the compared one, the read APIs are not comparable")
+    for size, size_results in results["sizes"].items():
+        print(f"\n{size} users: generated in {size_results['generate_s']:.2f} s, loaded in "
+              f"{size_results['load_s']:.2f} s")
+        header = f"{'api':<24} {'ops/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+        print(header + (f" {'vs base':>8}" if baseline else ""))
+        for api, stats in size_results["apis"].items():
+            line = (f"{api:<24} {stats['ops_per_sec']:>10.0f} {stats['p50_ms']:>8.3f} {stats['p95_ms']:>8.3f} "
+                    f"{stats['p99_ms']:>8.3f} {stats['errors']:>6}")
+            base = (baseline or {}).get("sizes", {}).get(size, {}).get("apis", {}).get(api)
+            if base and base["ops_per_sec"]:
+                line += f" {stats['ops_per_sec'] / base['ops_per_sec']:>7.2f}x"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--ops", type=int, default=1000, help="Calls per API and size")
+    parser.add_argument("--dir", default="/tmp/api_bench")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--response-cache", type=int, default=0,
+                        help="Entries of the response cache, 0 (default) to time every read uncached")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Results file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    cwd = os.getcwd()
+    results = {"commit": git_commit(), "python": sys.version.split()[0], "ops": args.ops,
+               "response_cache_size": args.response_cache, "sizes": {}}
+    try:
+        for size in args.sizes:
+            results["sizes"][str(size)] = run_size(size, args.ops, os.path.join(args.dir, str(size)), args.seed,
+                                                   args.response_cache)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(args.dir, ignore_errors=True)
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_results(results, baseline)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Populate a db directory with a deterministic synthetic data set: users, teams of up to 50 members, boards and tasks.
+
+The same arguments always produce the same records and ids. Records are written straight into the collections in
+one batch, with the derived data the services maintain (memberships, task lists, counters, aggregates and the search
+index), so large data sets are generated at storage speed instead of one validated API call at a time.
+
+Usage: python -m benchmarks.generate_data --users 100000 [--teams N] [--boards N] [--tasks N] [--db db] [--seed 0]
+"""
+import argparse
+import random
+import uuid
+from data_store import DataStore, TASK_STATUSES
+from aggregates import empty_team_stats, count_user_task
+
+CREATION_TIME = "2025-01-01T00:00:00"
+
+
+def default_counts(users: int) -> dict:
+    """The sizes of the other collections for a data set of `users` users."""
+    return {"users": users, "teams": max(1, users // 20), "boards": max(1, users // 10), "tasks": users}
+
+
+def generate(store: DataStore, users: int, teams: int = None, boards: int = None, tasks: int = None,
+             seed: int = 0) -> dict:
+    """Add the records to the store and return their ids, {"users": [...], "teams": [...], ...}."""
+    counts = default_counts(users)
+    teams = teams or counts["teams"]
+    boards = boards or counts["boards"]
+    tasks = tasks if tasks is not None else counts["tasks"]
+    rng = random.Random(seed)
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    ids = {"users": [], "teams": [], "boards": [], "tasks": []}
+    with store.batch():
+        for i in range(users):
+            user_id = new_id()
+            store.users.put(user_id, {"name": f"user{i}", "display_name": f"User {i}",
+                                      "creation_time": CREATION_TIME})
+            ids["users"].append(user_id)
+
+        # Users are dealt to the teams in turn, up to 50 members per team
+        members = {}
+        user_teams = {}
+        for i in range(teams):
+            team_id = new_id()
+            members[team_id] = ids["users"][i % users::teams][:50]
+            store.teams.put(team_id, {"name": f"team{i}", "description": f"Team {i}", "creation_time": CREATION_TIME,
+                                      "admin": members[team_id][0], "users": members[team_id]})
+            for user_id in members[team_id]:
+                user_teams.setdefault(user_id, []).append(team_id)
+            ids["teams"].append(team_id)
+        for user_id, team_ids in user_teams.items():
+            store.user_teams.put(user_id, team_ids)
+
+        board_teams = {}
+        board_tasks = {}
+        board_counts = {}
+        board_user_counts = {}
+        team_stats = {}
+        for i in range(boards):
+            board_id = new_id()
+            board_teams[board_id] = ids["teams"][i % teams]
+            board_tasks[board_id] = []
+            board_counts[board_id] = dict.fromkeys(TASK_STATUSES, 0)
+            board_user_counts[board_id] = {}
+            team_stats.setdefault(board_teams[board_id], empty_team_stats())["board_counts"]["OPEN"] += 1
+            ids["boards"].append(board_id)
+
+        user_tasks = {}
+        for i in range(tasks):
+            task_id = new_id()
+            board_id = ids["boards"][i % boards]
+            team_members = members[board_teams[board_id]]
+            user_id = team_members[rng.randrange(len(team_members))]
+            status = TASK_STATUSES[rng.randrange(len(TASK_STATUSES))]
+            task = {"title": f"task{i}", "description": f"Task {i}", "user_id": user_id, "board_id": board_id,
+                    "creation_time": CREATION_TIME, "status": status}
+            store.tasks.put(task_id, task)
+            store.index_task(task_id, task)
+            user_tasks.setdefault(user_id, {task_status: [] for task_status in TASK_STATUSES})[status].append(task_id)
+            board_tasks[board_id].append(task_id)
+            board_counts[board_id][status] += 1
+            board_user_counts[board_id] = count_user_task(board_user_counts[board_id], user_id, None, status)
+            stats = team_stats[board_teams[board_id]]
+            stats["task_counts"][status] += 1
+            stats["user_counts"] = count_user_task(stats["user_counts"], user_id, None, status)
+            ids["tasks"].append(task_id)
+
+        for user_id, task_ids in user_tasks.items():
+            store.user_tasks.put(user_id, task_ids)
+
+        for i, board_id in enumerate(ids["boards"]):
+            store.boards.put(board_id, {"name": f"board{i}", "description": f"Board {i}",
+                                        "team_id": board_teams[board_id], "creation_time": CREATION_TIME,
+                                        "status": "OPEN", "tasks": board_tasks[board_id],
+                                        "task_counts": board_counts[board_id],
+                                        "user_counts": board_user_counts[board_id]})
+        for team_id, stats in team_stats.items():
+            store.team_stats.put(team_id, stats)
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, required=True, help="At least 1")
+    parser.add_argument("--teams", type=int)
+    parser.add_argument("--boards", type=int)
+    parser.add_argument("--tasks", type=int)
+    parser.add_argument("--db", default="db")
+    parser.add_argument("--backend", choices=["file", "sqlite"], default="file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = DataStore(args.db, backend=args.backend)
+    ids = generate(store, args.users, args.teams, args.boards, args.tasks, args.seed)
+    store.close()
+    print(", ".join(f"{len(values)} {name}" for name, values in ids.items()))
+
+
+if __name__ == "__main__":
+    main()
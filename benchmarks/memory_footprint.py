@@ -0,0 +1,56 @@
+"""
+Compare the memory held by the tasks and boards of a data set loaded with and without id interning.
+
+Usage: python -m benchmarks.memory_footprint [--sizes 1000000] [--dir /tmp/memory_bench]
+"""
+import argparse
+import gc
+import os
+import shutil
+import tracemalloc
+from benchmarks.snapshot_startup import make_tasks
+from data_store import INTERN_FIELDS
+from storage import LogStore
+
+
+def write_data_set(directory: str, count: int):
+    tasks = LogStore(os.path.join(directory, "tasks.json"))
+    tasks.data.update(make_tasks(count))
+    boards = LogStore(os.path.join(directory, "boards.json"))
+    for task_id, task in tasks.data.items():
+        board = boards.data.setdefault(task["board_id"], {"name": "Board", "status": "OPEN", "tasks": []})
+        board["tasks"].append(task_id)
+    tasks.checkpoint()
+    boards.checkpoint()
+
+
+def measure_load(directory: str, intern: bool):
+    gc.collect()
+    tracemalloc.start()
+    stores = [LogStore(os.path.join(directory, f"{name}.json"), intern_fields=INTERN_FIELDS[name] if intern else ())
+              for name in ("tasks", "boards")]
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del stores
+    return memory / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000000])
+    parser.add_argument("--dir", default="/tmp/memory_bench")
+    args = parser.parse_args()
+
+    print(f"{'tasks':>10} {'plain MB':>9} {'intern MB':>9} {'saved':>6}")
+    for size in args.sizes:
+        shutil.rmtree(args.dir, ignore_errors=True)
+        write_data_set(args.dir, size)
+        plain_mb = measure_load(args.dir, intern=False)
+        intern_mb = measure_load(args.dir, intern=True)
+        print(f"{size:>10} {plain_mb:>9.0f} {intern_mb:>9.0f} {1 - intern_mb / plain_mb:>6.0%}")
+    shutil.rmtree(args.dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
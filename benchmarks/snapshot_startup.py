@@ -0,0 +1,71 @@
+"""
+Compare the time it takes to load a collection from a JSON snapshot and from a binary snapshot.
+
+Usage: python -m benchmarks.snapshot_startup [--sizes 100000 1000000] [--dir /tmp/snapshot_bench]
+"""
+import argparse
+import os
+import shutil
+import time
+import uuid
+from storage import LogStore
+
+
+def make_tasks(count: int) -> dict:
+    board_ids = [str(uuid.uuid4()) for _ in range(max(1, count // 100))]
+    user_ids = [str(uuid.uuid4()) for _ in range(max(1, count // 20))]
+    return {
+        str(uuid.uuid4()): {
+            "title": f"Task {i}",
+            "description": f"Description of task {i}",
+            "user_id": user_ids[i % len(user_ids)],
+            "board_id": board_ids[i % len(board_ids)],
+            "creation_time": "2025-01-01T00:00:00",
+            "status": "OPEN"
+        }
+        for i in range(count)
+    }
+
+
+def time_load(path: str, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        LogStore(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--dir", default="/tmp/snapshot_bench")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'json MB':>8} {'snap MB':>8} {'json s':>8} {'snap s':>8} {'speedup':>8}")
+    for size in args.sizes:
+        shutil.rmtree(args.dir, ignore_errors=True)
+        path = os.path.join(args.dir, "tasks.json")
+        store = LogStore(path, snapshot_format="both")
+        store.data.update(make_tasks(size))
+        store.checkpoint()
+        del store
+
+        # The binary snapshot is preferred while it is the most recent one, hide it to time the JSON load
+        snapshot_path = os.path.splitext(path)[0] + ".snap"
+        binary_time = time_load(path, args.repeat)
+        os.rename(snapshot_path, snapshot_path + ".off")
+        json_time = time_load(path, args.repeat)
+        os.rename(snapshot_path + ".off", snapshot_path)
+
+        json_mb = os.path.getsize(path) / 2 ** 20
+        snap_mb = os.path.getsize(snapshot_path) / 2 ** 20
+        print(f"{size:>10} {json_mb:>8.1f} {snap_mb:>8.1f} {json_time:>8.3f} {binary_time:>8.3f} "
+              f"{json_time / binary_time:>7.1f}x")
+    shutil.rmtree(args.dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
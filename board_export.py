@@ -0,0 +1,78 @@
+import os
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+OUT_DIR = "out"
+# Upper bound of the worker processes of export_board_files(). Exports mostly format text and write files, so more
+# workers than CPUs can pay off, but every worker is a process of its own
+MAX_EXPORT_WORKERS = 64
+TASK_FIELDS = ["id", "title", "description", "user_id", "status", "creation_time"]
+
+
+def write_txt(f, board_id: str, board: dict, tasks):
+    f.write(f"Board Name: {board['name']}\nDescription: {board['description']}\n"
+            f"Creation Time: {board['creation_time']}\nStatus: {board['status']}\n\nTasks:\n")
+    for _, task in tasks:
+        f.write(f"- Title: {task['title']}\n  Description: {task['description']}\n  User: {task['user_id']}\n"
+                f"  Status: {task['status']}\n\n")
+
+
+def write_csv(f, board_id: str, board: dict, tasks):
+    """One row per task, with a header row."""
+    writer = csv.DictWriter(f, TASK_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for task_id, task in tasks:
+        writer.writerow({"id": task_id, **task})
+
+
+def write_jsonl(f, board_id: str, board: dict, tasks):
+    """The board on the first line (without its task ids), then one task per line."""
+    f.write(json.dumps({"id": board_id, **{key: value for key, value in board.items() if key != "tasks"}}) + "\n")
+    for task_id, task in tasks:
+        f.write(json.dumps({"id": task_id, **task}) + "\n")
+
+
+EXPORT_FORMATS = {"txt": write_txt, "csv": write_csv, "jsonl": write_jsonl}
+
+
+def export_board_file(board_id: str, board: dict, tasks, export_format: str = "txt", out_dir: str = OUT_DIR) -> str:
+    """
+    Write a board and its tasks to out_dir/board_<board_id>.<format> and return the file name.
+    `tasks` may be any iterable of (task_id, task) pairs, the tasks are written one at a time as they are produced.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    out_file = os.path.join(out_dir, f"board_{board_id}.{export_format}")
+    with open(out_file, "w", newline="") as f:
+        EXPORT_FORMATS[export_format](f, board_id, board, tasks)
+    return out_file
+
+
+def _export_board_files(jobs: list) -> list:
+    return [export_board_file(*job) for job in jobs]
+
+
+def export_board_files(jobs, workers: int = None, jobs_per_chunk: int = 16) -> list:
+    """
+    Export many boards with a pool of worker processes and return their file names in the order of the jobs.
+    `jobs` yields the (board_id, board, tasks, export_format, out_dir) arguments of export_board_file(), and is
+    consumed a few chunks ahead of the workers so the tasks of all the boards are never held in memory at once.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    out_files = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = []
+        chunk = []
+        for job in jobs:
+            chunk.append(job)
+            if len(chunk) == jobs_per_chunk:
+                in_flight.append(pool.submit(_export_board_files, chunk))
+                chunk = []
+                if len(in_flight) >= max_in_flight:
+                    out_files.extend(in_flight.pop(0).result())
+        if chunk:
+            in_flight.append(pool.submit(_export_board_files, chunk))
+        for future in in_flight:
+            out_files.extend(future.result())
+    return out_files
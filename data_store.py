@@ -0,0 +1,550 @@
+import os
+import json
+import fcntl
+import atexit
+import threading
+import functools
+from contextlib import contextmanager, ExitStack
+from bisect import bisect_left
+from itertools import islice
+from storage import Collection, ListCollection, LogStore, ShardedLogStore, ShardedListStore
+from sqlite_storage import SqliteDatabase
+from instrumentation import timed
+from task_search import term_weights
+from response_cache import ResponseCache
+from aggregates import TASK_STATUSES, empty_team_stats
+
+# Fields of the records of the file backend holding ids, or values from a small set, interned by the LogStores
+INTERN_FIELDS = {
+    "teams": ("admin", "users"),
+    "boards": ("team_id", "status", "tasks"),
+    "tasks": ("user_id", "board_id", "status"),
+    "user_tasks": tuple(TASK_STATUSES),
+}
+
+
+class DataStore:
+    """
+    The collections of the planner, loaded once and shared by the managers.
+
+    UserManager, TeamManager and ProjectBoardManager constructed on the same DataStore work on a single in-memory
+    copy of every collection, so validating a reference to another entity (the admin of a team, the team of a board)
+    is a dict lookup instead of loading the other manager's file.
+
+    The storage backend is selected with `backend`:
+    * "file": JSON snapshots with append-only operation logs (LogStore). Users, teams and boards are held in memory,
+      tasks are sharded per board under db/tasks/ and a board's tasks are loaded when the board is first used.
+    * "sqlite": indexed tables in db/planner.sqlite3 (SqliteStore), records are only read when they are accessed.
+
+    `snapshot_format` is passed to the LogStores of the file backend ("json", "binary" or "both").
+
+    With `multiprocess=True` several processes can work on the same db directory. Every write operation runs under an
+    exclusive fcntl lock on db/.lock, catches up with the other processes before validating, and bumps db/.version
+    when it is done. Read operations only stat db/.version and reload the collections when it changed.
+
+    `durability` selects when the changes of a write operation reach the disk:
+    * "immediate" (default): before the operation returns.
+    * "write_behind": the changes are kept in memory and written in groups, by a background thread every
+      `flush_interval_ms` milliseconds or by the write operation that completes `flush_every_ops` unwritten operations,
+      whichever comes first. flush() writes them right away, and they are also written on close() and at exit. The
+      operations of the last interval are lost if the process dies. Not available in multiprocess mode, other
+      processes would not see the unwritten changes.
+
+    `response_cache_size` bounds the number of serialized read responses the managers keep in `response_cache` (0
+    disables it). Write operations invalidate the responses built from the data they change, and a refresh() that
+    picks up changes of other processes drops them all.
+
+    Managers and services created without a store share DataStore.default(), one store per db directory.
+    """
+
+    # The stores returned by default(), keyed by the absolute path of their db directory
+    _defaults = {}
+
+    def __init__(self, db_dir: str = "db", backend: str = "file", snapshot_format: str = "json",
+                 multiprocess: bool = False, durability: str = "immediate", flush_interval_ms: int = 100,
+                 flush_every_ops: int = 1000, response_cache_size: int = 10000):
+        self.db_dir = db_dir
+        self.backend = backend
+        self.snapshot_format = snapshot_format
+        self.multiprocess = multiprocess
+        if durability not in ("immediate", "write_behind"):
+            raise ValueError(f"Unknown durability: {durability}")
+        if durability == "write_behind" and multiprocess:
+            raise ValueError("Write-behind durability is not available in multiprocess mode")
+        self.durability = durability
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_every_ops = flush_every_ops
+        self.lock_path = os.path.join(db_dir, ".lock")
+        self.version_path = os.path.join(db_dir, ".version")
+        self._lock_file = None
+        self._lock_depth = 0
+        self._seen_version = None
+        self.response_cache = ResponseCache(response_cache_size)
+        os.makedirs(db_dir, exist_ok=True)
+        if backend == "sqlite":
+            self.database = SqliteDatabase(os.path.join(db_dir, "planner.sqlite3"))
+        elif backend != "file":
+            raise ValueError(f"Unknown storage backend: {backend}")
+
+        # Other processes may be creating or migrating the same files
+        with self._exclusive():
+            self._open_collections()
+
+        # Serializes the write operations with the flushes of the write-behind thread
+        self._flush_mutex = threading.RLock()
+        self._unflushed_ops = 0
+        self._write_behind = None
+        if durability == "write_behind":
+            self._start_write_behind()
+
+    @classmethod
+    def default(cls, db_dir: str = "db") -> "DataStore":
+        """The store shared by the managers and services created without one, opened on first use."""
+        key = os.path.abspath(db_dir)
+        store = cls._defaults.get(key)
+        if store is None:
+            store = cls._defaults[key] = cls(db_dir)
+        return store
+
+    def _open_collections(self):
+        self.users = self._open_collection("users")
+        self.users.add_index("name")
+
+        self.teams = self._open_collection("teams")
+        self.teams.add_index("name")
+
+        self.boards = self._open_collection("boards")
+        self.boards.add_index("team_id", "name")
+        # Partitions the boards of every team into its OPEN and CLOSED boards
+        self.boards.add_index("team_id", "status")
+
+        self.tasks = self._open_collection("tasks")
+        self.tasks.add_index("board_id", "title")
+        self.tasks.add_index("board_id", "status")
+        self.tasks.add_index("board_id", "user_id")
+
+        # The ids of the tasks assigned to every user by status, {"OPEN": [...], "IN_PROGRESS": [...], "COMPLETE": [...]}
+        # keyed by user id, since the per-board task shards cannot answer a query by user on their own
+        self.user_tasks = self._open_collection("user_tasks")
+
+        # Inverted index of the words of the task titles and descriptions: every term maps to its postings
+        # [task_id, board_id, weight], stored one by one, see task_search.term_weights()
+        self.search_index = self._open_list_collection("search_postings")
+        # The terms of search_index in sorted order for prefix searches, built on first use
+        self._search_terms = None
+
+        # Materialized aggregates of every team with boards, see aggregates.empty_team_stats(). The per-user counts
+        # of a board are kept in its own record next to its task_counts
+        self.team_stats = self._open_collection("team_stats")
+
+        self.user_teams = self._open_collection("user_teams")
+        # Sets of team IDs of the users looked up so far, loaded from user_teams on first use
+        self.memberships = {}
+
+        if self.backend == "file":
+            self._shard_tasks()
+        if not len(self.user_teams) and len(self.teams):
+            self._generate_user_team_mapping()
+        elif self._legacy_user_teams():
+            self._generate_user_team_mapping()
+            # Written as a new generation, so that it is not regenerated again
+            self.user_teams.checkpoint()
+        if len(self.tasks) and "OPEN" not in next(iter(self.user_tasks.values()), {}):
+            self._generate_user_task_mapping()
+        if len(self.tasks) and not self.search_index:
+            self._drop_legacy_search_index()
+            self._generate_search_index()
+        if self.backend == "file":
+            self._count_board_tasks()
+        if not len(self.team_stats) and len(self.boards):
+            self._generate_team_stats()
+        self._seen_version = self._version()
+
+    def _open_collection(self, name: str) -> Collection:
+        if self.backend == "sqlite":
+            return self.database.collection(name)
+        if name == "tasks":
+            return ShardedLogStore(os.path.join(self.db_dir, "tasks"), shard_field="board_id",
+                                   snapshot_format=self.snapshot_format, intern_fields=INTERN_FIELDS["tasks"])
+        return LogStore(os.path.join(self.db_dir, f"{name}.json"), snapshot_format=self.snapshot_format,
+                        intern_fields=INTERN_FIELDS.get(name, ()))
+
+    def _open_list_collection(self, name: str) -> ListCollection:
+        if self.backend == "sqlite":
+            return self.database.list_collection(name)
+        return ShardedListStore(os.path.join(self.db_dir, name), snapshot_format=self.snapshot_format)
+
+    def _shard_tasks(self):
+        """Move the tasks of a db/tasks.json written before tasks were sharded per board into their shards."""
+        task_file = os.path.join(self.db_dir, "tasks.json")
+        legacy_tasks = LogStore(task_file)
+        if not len(legacy_tasks):
+            return
+
+        with self.tasks.batch():
+            for task_id, task in legacy_tasks.items():
+                self.tasks.put(task_id, task)
+        self.tasks.checkpoint()
+        for path in (legacy_tasks.path, legacy_tasks.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _legacy_user_teams(self) -> bool:
+        """
+        Whether user_teams.json was written before the operation log (a snapshot without a generation header). Those
+        versions did not record the admins of new teams in it, so it cannot be trusted.
+        """
+        return self.backend == "file" and os.path.exists(self.user_teams.path) and self.user_teams.generation == 0
+
+    def _generate_user_team_mapping(self):
+        """
+        Generate a mapping of user IDs to team IDs from the teams and save it.
+        This mapping can be used to quickly find the teams a user belongs to.
+        """
+        user_team_map = {}
+
+        for team_id, team in self.teams.items():
+            for user_id in team.get("users", []):
+                if user_id not in user_team_map:
+                    user_team_map[user_id] = []
+                user_team_map[user_id].append(team_id)  # Use team_id from key
+
+        with self.user_teams.batch():
+            for user_id in [user_id for user_id in self.user_teams.keys() if user_id not in user_team_map]:
+                self.user_teams.delete(user_id)
+            for user_id, team_ids in user_team_map.items():
+                self.user_teams.put(user_id, team_ids)
+        self.memberships.clear()
+
+    def _generate_user_task_mapping(self):
+        """
+        Generate the ids of the tasks of every user by status from the tasks written before user_tasks existed, or
+        before it was split by status.
+        """
+        user_task_map = {}
+        for task_id, task in self.tasks.items():
+            task_ids = user_task_map.get(task["user_id"])
+            if task_ids is None:
+                task_ids = user_task_map[task["user_id"]] = {status: [] for status in TASK_STATUSES}
+            task_ids[task["status"]].append(task_id)
+
+        with self.user_tasks.batch():
+            for user_id, task_ids in user_task_map.items():
+                self.user_tasks.put(user_id, task_ids)
+
+    def _drop_legacy_search_index(self):
+        """Remove the search index written before postings were stored one by one, it is rebuilt from the tasks."""
+        if self.backend == "sqlite":
+            self.database.execute("DROP TABLE IF EXISTS search_index")
+            return
+        for extension in (".json", ".log", ".snap"):
+            path = os.path.join(self.db_dir, f"search_index{extension}")
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _generate_search_index(self):
+        """Index the tasks written before the search index existed."""
+        with self.search_index.batch():
+            for task_id, task in self.tasks.items():
+                self.index_task(task_id, task)
+
+    def _count_board_tasks(self):
+        """Fill in the per-status task counters of boards persisted before the counters existed."""
+        board_task_counts = {}
+        for board_id, board in self.boards.items():
+            if "task_counts" not in board:
+                counts = board_task_counts[board_id] = dict.fromkeys(TASK_STATUSES, 0)
+                for task_id in board["tasks"]:
+                    task = self.tasks.get(task_id)
+                    if task:
+                        counts[task["status"]] += 1
+
+        with self.boards.batch():
+            for board_id, counts in board_task_counts.items():
+                self.boards.update(board_id, {"task_counts": counts})
+
+    def _generate_team_stats(self):
+        """Compute the aggregates of the teams, and the per-user counts of the boards, written before they existed."""
+        all_team_stats = {}
+        board_user_counts = {}
+        for board_id, board in self.boards.items():
+            team_stats = all_team_stats.setdefault(board["team_id"], empty_team_stats())
+            team_stats["board_counts"][board["status"]] += 1
+            user_counts = board_user_counts[board_id] = {}
+            for task_id in board["tasks"]:
+                task = self.tasks.get(task_id)
+                if not task:
+                    continue
+                team_stats["task_counts"][task["status"]] += 1
+                for counts in (user_counts, team_stats["user_counts"]):
+                    user = counts.setdefault(task["user_id"], {"assigned": 0, "completed": 0})
+                    user["assigned"] += 1
+                    user["completed"] += task["status"] == "COMPLETE"
+
+        with self.batch():
+            for board_id, user_counts in board_user_counts.items():
+                self.boards.update(board_id, {"user_counts": user_counts})
+            for team_id, team_stats in all_team_stats.items():
+                self.team_stats.put(team_id, team_stats)
+
+    def collections(self) -> list:
+        return [self.users, self.teams, self.boards, self.tasks, self.user_teams, self.user_tasks, self.search_index,
+                self.team_stats]
+
+    @contextmanager
+    def batch(self):
+        """Group the writes of all the collections made inside the block, see LogStore.batch()."""
+        with ExitStack() as stack:
+            for collection in self.collections():
+                stack.enter_context(collection.batch())
+            yield self
+
+    def flush(self):
+        """Write the records of the current batch() block of every collection now, without ending the block."""
+        with self._flush_mutex:
+            self._unflushed_ops = 0
+            if self.backend == "sqlite":
+                self.database.flush()
+                return
+            for collection in self.collections():
+                collection.flush()
+
+    def _start_write_behind(self):
+        # The writes of the whole session are one batch, flushed periodically
+        self._write_behind = ExitStack()
+        self._write_behind.enter_context(self.batch())
+        stopped = threading.Event()
+        self._write_behind.callback(stopped.set)
+
+        def flush_periodically():
+            while not stopped.wait(self.flush_interval_ms / 1000):
+                self.flush()
+        thread = threading.Thread(target=flush_periodically, name="planner-write-behind", daemon=True)
+        thread.start()
+        atexit.register(self._stop_write_behind)
+
+    def _stop_write_behind(self):
+        """Stop the write-behind thread and write the remaining changes."""
+        if self._write_behind is None:
+            return
+        atexit.unregister(self._stop_write_behind)
+        with self._flush_mutex:
+            self._write_behind.close()
+            self._write_behind = None
+
+    def _version(self):
+        try:
+            stat = os.stat(self.version_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def refresh(self):
+        """Catch up with the changes committed by other processes, only when db/.version says there are any."""
+        if not self.multiprocess:
+            return
+        version = self._version()
+        if version == self._seen_version:
+            return
+        self._seen_version = version
+        for collection in self.collections():
+            collection.refresh()
+        # Memberships may have changed even where the collection itself reads through (sqlite)
+        self.memberships.clear()
+        self._search_terms = None
+        self.response_cache.clear()
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the exclusive fcntl lock of the db directory for the block (reentrant, multiprocess mode only)."""
+        if not self.multiprocess:
+            yield
+            return
+
+        if not self._lock_depth:
+            self._lock_file = open(self.lock_path, "a")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if not self._lock_depth:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                self._lock_file.close()
+                self._lock_file = None
+
+    @contextmanager
+    def write_lock(self):
+        """
+        Hold the exclusive lock of the db directory for the block, after catching up with other processes, and
+        publish a new version at the end. Reentrant, and a no-op unless the store was created with multiprocess=True.
+        In write-behind mode it keeps the write-behind thread out of the block instead, and counts the operation.
+        """
+        if self._write_behind is not None:
+            with self._flush_mutex:
+                yield self
+                self._unflushed_ops += 1
+                if self._unflushed_ops >= self.flush_every_ops:
+                    self.flush()
+            return
+        if not self.multiprocess:
+            yield self
+            return
+
+        outermost = not self._lock_depth
+        with self._exclusive():
+            if outermost:
+                self.refresh()
+            try:
+                yield self
+            finally:
+                if outermost:
+                    self._bump_version()
+
+    def _bump_version(self):
+        # A new file every time, so the inode tells readers apart even within the mtime resolution
+        tmp_path = self.version_path + ".tmp"
+        with open(tmp_path, "w"):
+            pass
+        os.replace(tmp_path, self.version_path)
+        self._seen_version = self._version()
+
+    def team_ids(self, user_id: str) -> set:
+        """The ids of the teams of a user, as a set owned by the store."""
+        team_ids = self.memberships.get(user_id)
+        if team_ids is None:
+            team_ids = self.memberships[user_id] = set(self.user_teams.get(user_id, ()))
+        return team_ids
+
+    def is_member(self, user_id: str, team_id: str) -> bool:
+        return team_id in self.team_ids(user_id)
+
+    def add_memberships(self, team_id: str, user_ids):
+        for user_id in user_ids:
+            team_ids = self.team_ids(user_id)
+            team_ids.add(team_id)
+            self.user_teams.put(user_id, list(team_ids))
+
+    def remove_memberships(self, team_id: str, user_ids):
+        for user_id in user_ids:
+            team_ids = self.team_ids(user_id)
+            team_ids.discard(team_id)
+            self.user_teams.put(user_id, list(team_ids))
+
+    def add_user_task(self, user_id: str, task_id: str):
+        """Record a new, OPEN task of a user."""
+        if user_id in self.user_tasks:
+            self.user_tasks.append(user_id, "OPEN", task_id)
+        else:
+            self.user_tasks.put(user_id, {status: [task_id] if status == "OPEN" else [] for status in TASK_STATUSES})
+
+    def move_user_task(self, user_id: str, task_id: str, old_status: str, new_status: str):
+        self.user_tasks.remove(user_id, old_status, task_id)
+        self.user_tasks.append(user_id, new_status, task_id)
+
+    def update_team_stats(self, team_id: str, fields: dict):
+        """Set some aggregates of a team, starting from empty_team_stats() for its first board."""
+        if team_id in self.team_stats:
+            self.team_stats.update(team_id, fields)
+        else:
+            self.team_stats.put(team_id, {**empty_team_stats(), **fields})
+
+    def index_task(self, task_id: str, task: dict, weights: dict = None):
+        """Add the terms of a new task to the search index, `weights` are those of term_weights() if already known."""
+        if weights is None:
+            weights = term_weights(task)
+        for term, weight in weights.items():
+            self.search_index.add(term, [task_id, task["board_id"], weight])
+            if self._search_terms is not None:
+                position = bisect_left(self._search_terms, term)
+                if position == len(self._search_terms) or self._search_terms[position] != term:
+                    self._search_terms.insert(position, term)
+
+    def terms_with_prefix(self, prefix: str) -> list:
+        """The terms of the search index starting with `prefix`."""
+        if self._search_terms is None:
+            self._search_terms = sorted(self.search_index.keys())
+        terms = []
+        for term in islice(self._search_terms, bisect_left(self._search_terms, prefix), None):
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def close(self):
+        if DataStore._defaults.get(os.path.abspath(self.db_dir)) is self:
+            del DataStore._defaults[os.path.abspath(self.db_dir)]
+        self._stop_write_behind()
+        # Closing checkpoints the collections, which must not overwrite the changes of other processes
+        with self._exclusive():
+            self.refresh()
+            for collection in self.collections():
+                collection.close()
+            if self.multiprocess:
+                self._bump_version()
+        if self.backend == "sqlite":
+            self.database.close()
+
+
+def write_operation(method):
+    """Run a service method that changes data under the store's write lock, see DataStore.write_lock()."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.store.write_lock():
+            return method(self, *args, **kwargs)
+    wrapper = timed(wrapper)
+    wrapper.writes = True
+    return wrapper
+
+
+def read_operation(method):
+    """Let a service method that only reads data see the changes of other processes first."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.store.refresh()
+        return method(self, *args, **kwargs)
+    wrapper = timed(wrapper)
+    wrapper.writes = False
+    return wrapper
+
+
+def read_page(collection: Collection, data: dict, key: str, render) -> dict:
+    """
+    Return one page of a collection in insertion order for a request with a "limit" and an optional "cursor", as
+    {key: [render(id, record), ...], "next_cursor": <cursor of the next page, or None after the last page>}.
+
+    The cursor is the Collection.scan() cursor of the last record of the previous page, so reaching a page seeks to it
+    instead of skipping over the records before it.
+    """
+    limit = data.get("limit")
+    if not isinstance(limit, int) or isinstance(limit, bool) or limit <= 0:
+        return {"error": "Limit must be a positive integer"}
+    cursor = data.get("cursor") or "0"
+    if not isinstance(cursor, str) or not cursor.isdigit():
+        return {"error": "Invalid cursor"}
+
+    # Read one record more than the page to know whether there is a next page
+    records = list(islice(collection.scan(int(cursor)), limit + 1))
+    page = records[:limit]
+    next_cursor = str(page[-1][0]) if len(records) > limit else None
+    return {key: [render(record_id, record) for _, record_id, record in page], "next_cursor": next_cursor}
+
+
+def stream_json_list(collection: Collection, render, chunk_size: int = 1000):
+    """
+    Yield the JSON encoding of [render(id, record), ...] over a whole collection in chunks of `chunk_size` records,
+    so the full list is never held in memory. The chunks come from a single Collection.scan(), records added between
+    chunks are included.
+    """
+    yield "["
+    records = collection.scan()
+    separator = ""
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        # One encoding call per chunk, without the brackets of the chunk's own list
+        yield separator + json.dumps([render(record_id, record) for _, record_id, record in chunk])[1:-1]
+        separator = ", "
+    yield "]"
@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import time
+import cProfile
+import functools
+
+
+# Where the profile_next API saves the profiles
+PROFILE_DIR = os.path.join("out", "profiles")
+
+
+class Stats:
+    """
+    Opt-in, process-wide instrumentation of the planner.
+
+    While enabled, it collects:
+    * per API method: the number of calls, the total time and a latency histogram with power-of-two microsecond
+      buckets. Manager methods (e.g. "UserManager.create_user") include the JSON decoding and encoding of the request
+      and response, service methods (e.g. "UserService.create_user") do not.
+    * per file of the file storage backend: the bytes read and written, and the time spent loading and saving it.
+
+    `profile_next(name, path)` runs the next call of one API method under cProfile and dumps the profile to `path`,
+    whether the stats are enabled or not.
+
+    Stats are enabled with stats.enable() or by setting the PLANNER_STATS environment variable. When disabled and no
+    profile is requested, instrumented calls only pay for the check of `active`.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.active = False
+        self._profile_requests = {}
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+        self._update_active()
+
+    def disable(self):
+        self.enabled = False
+        self._update_active()
+
+    def _update_active(self):
+        self.active = self.enabled or bool(self._profile_requests)
+
+    def reset(self):
+        self.calls = {}
+        self.files = {}
+
+    def profile_next(self, name: str, path: str):
+        """Profile the next call of the API method `name` (e.g. "ProjectBoardManager.add_task") into `path`."""
+        self._profile_requests[name] = path
+        self._update_active()
+
+    def record_call(self, name: str, elapsed: float):
+        call = self.calls.get(name)
+        if call is None:
+            call = self.calls[name] = {"calls": 0, "total_s": 0.0, "histogram": {}}
+        call["calls"] += 1
+        call["total_s"] += elapsed
+        bucket = int(elapsed * 1e6).bit_length()
+        call["histogram"][bucket] = call["histogram"].get(bucket, 0) + 1
+
+    def record_io(self, path: str, bytes_read: int = 0, bytes_written: int = 0, load_s: float = 0.0,
+                  save_s: float = 0.0):
+        file_stats = self.files.get(path)
+        if file_stats is None:
+            file_stats = self.files[path] = {"bytes_read": 0, "bytes_written": 0, "load_s": 0.0, "save_s": 0.0}
+        file_stats["bytes_read"] += bytes_read
+        file_stats["bytes_written"] += bytes_written
+        file_stats["load_s"] += load_s
+        file_stats["save_s"] += save_s
+
+    def report(self) -> dict:
+        """The collected stats as a JSON-serializable dict."""
+        apis = {}
+        for name, call in sorted(self.calls.items()):
+            apis[name] = {
+                "calls": call["calls"],
+                "total_ms": call["total_s"] * 1000,
+                "mean_ms": call["total_s"] * 1000 / call["calls"],
+                # Bucket k counts the calls that took less than 2^k microseconds
+                "latency_histogram_us": {f"<{2 ** bucket}": count
+                                         for bucket, count in sorted(call["histogram"].items())}
+            }
+        files = {path: dict(file_stats) for path, file_stats in sorted(self.files.items())}
+        return {
+            "enabled": self.enabled,
+            "apis": apis,
+            "files": files,
+            "load_s": sum(file_stats["load_s"] for file_stats in files.values()),
+            "save_s": sum(file_stats["save_s"] for file_stats in files.values())
+        }
+
+    def _profile(self, name: str, method, args, kwargs):
+        path = self._profile_requests.pop(name)
+        self._update_active()
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(method, *args, **kwargs)
+        finally:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            profiler.dump_stats(path)
+
+
+stats = Stats()
+if os.environ.get("PLANNER_STATS"):
+    stats.enable()
+
+
+def stats_report(data: dict, store=None) -> dict:
+    """
+    The get_stats API on a decoded request: the stats report, with the counters of the response cache of `store`.
+    A request of {"reset": true} clears them after reading.
+    """
+    report = stats.report()
+    if store is not None:
+        report["response_cache"] = store.response_cache.report()
+    if data.get("reset"):
+        stats.reset()
+        if store is not None:
+            store.response_cache.reset_stats()
+    return report
+
+
+def stats_response(request: str = None, store=None) -> str:
+    """The response of the get_stats API of the managers, see stats_report()."""
+    return json.dumps(stats_report(json.loads(request) if request else {}, store), indent=2)
+
+
+def profile_request(data: dict) -> dict:
+    """
+    The profile_next API on a decoded request {"api": "<method name>"}, e.g. "ProjectBoardService.add_task": profile
+    the next call of the method into PROFILE_DIR/<method name>.prof, see Stats.profile_next().
+    """
+    name = data.get("api")
+    if not isinstance(name, str) or not re.fullmatch(r"\w+\.\w+", name):
+        return {"error": "API must be a method name like ProjectBoardService.add_task"}
+    path = os.path.join(PROFILE_DIR, f"{name}.prof")
+    stats.profile_next(name, path)
+    return {"path": path}
+
+
+def timed(method, name: str = None):
+    """Record the calls of `method` in `stats` under `name` (the qualified name of the method by default)."""
+    name = name or method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if not stats.active:
+            return method(*args, **kwargs)
+        if name in stats._profile_requests:
+            return stats._profile(name, method, args, kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            if stats.enabled:
+                stats.record_call(name, time.perf_counter() - start)
+    return wrapper
+
+
+def instrument(cls):
+    """Class decorator recording the calls of all the public methods of a manager, see timed()."""
+    for name, method in list(vars(cls).items()):
+        if callable(method) and not name.startswith("_") and name != "get_stats":
+            setattr(cls, name, timed(method, f"{cls.__name__}.{name}"))
+    return cls
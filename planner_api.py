@@ -0,0 +1,32 @@
+from data_store import DataStore
+from user_service import UserService
+from team_service import TeamService
+from project_board_service import ProjectBoardService
+from instrumentation import stats_report, profile_request
+
+
+def api_methods(store: DataStore) -> dict:
+    """
+    Map the name of every API (e.g. "create_user") to the bound method of its service on `store`, plus get_stats and
+    profile_next to read the instrumentation of a running process (see instrumentation.py).
+    The methods take the request as a dict (no argument for list_users, list_teams and get_stats) and return the
+    response.
+    """
+    apis = {}
+    for service in (UserService(store), TeamService(store), ProjectBoardService(store)):
+        for name in dir(service):
+            method = getattr(service, name)
+            # Set by the read_operation and write_operation decorators
+            if hasattr(method, "writes"):
+                apis[name] = method
+
+    def get_stats(data: dict = None) -> dict:
+        return stats_report(data or {}, store)
+
+    def profile_next(data: dict) -> dict:
+        return profile_request(data)
+
+    get_stats.writes = profile_next.writes = False
+    apis["get_stats"] = get_stats
+    apis["profile_next"] = profile_next
+    return apis
@@ -0,0 +1,96 @@
+import json
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from data_store import DataStore
+from planner_api import api_methods
+
+# Read APIs that write files (and start worker processes), run on a thread instead of the event loop
+OFFLOADED_APIS = {"export_board", "export_team_boards", "export_all_boards"}
+
+class PlannerServer:
+    """
+    A long-running asyncio server for the planner APIs, speaking newline-delimited JSON over TCP or a Unix socket.
+
+    Every request is one line `{"api": "<name>", "request": {...}}`, where the name is any method of UserBase,
+    TeamBase or ProjectBoardBase, or get_stats / profile_next (see planner_api.api_methods()), and "request" is omitted
+    for the APIs without one (list_users, list_teams, get_stats). The response is the API's response encoded on a
+    single line.
+
+    The store is loaded once and stays in memory for the lifetime of the server. Read APIs run on the event loop as
+    soon as they arrive. Write APIs are serialized: each one is applied to memory on the event loop, then its log
+    records are written by a worker thread while reads carry on, and it is answered once they are on disk. The whole
+    server runs inside a DataStore.batch() block, so nothing reaches the disk before DataStore.flush() is called.
+    Exports run on a thread of their own, holding off the writes until they are done while reads carry on.
+
+    The server must be the only process using its db directory.
+    """
+
+    def __init__(self, store: DataStore = None):
+        self.store = store or DataStore.default()
+        self.apis = api_methods(self.store)
+        self._write_lock = asyncio.Lock()
+        self._flusher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner-flush")
+        self._exporter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner-export")
+        self._batch = ExitStack()
+
+    async def handle(self, message: dict):
+        """Run the API call of one decoded request and return its response."""
+        method = self.apis.get(message.get("api"))
+        if method is None:
+            return {"error": f"Unknown API: {message.get('api')}"}
+        args = (message["request"],) if "request" in message else ()
+
+        if message["api"] in OFFLOADED_APIS:
+            # The export reads the store from another thread, so no write may change it meanwhile
+            async with self._write_lock:
+                return await asyncio.get_running_loop().run_in_executor(self._exporter,
+                                                                        functools.partial(method, *args))
+        if not method.writes:
+            return method(*args)
+        async with self._write_lock:
+            response = method(*args)
+            await asyncio.get_running_loop().run_in_executor(self._flusher, self.store.flush)
+        return response
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    response = {"error": "Request is not valid JSON"}
+                else:
+                    if not isinstance(message, dict):
+                        response = {"error": "Request must be a JSON object"}
+                    else:
+                        try:
+                            response = await self.handle(message)
+                        except (AttributeError, KeyError, TypeError):
+                            response = {"error": "Malformed request"}
+                        except Exception as error:
+                            response = {"error": f"Request failed: {error}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: str = None):
+        """Serve until cancelled, then write the remaining records and close the store."""
+        self._batch.enter_context(self.store.batch())
+        if unix_path:
+            server = await asyncio.start_unix_server(self._serve_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self._serve_client, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            async with self._write_lock:
+                self._batch.close()
+            self._flusher.shutdown()
+            self._exporter.shutdown()
+            self.store.close()
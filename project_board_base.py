@@ -35,6 +35,7 @@ class ProjectBoardBase:
         Constraint:
           * Set the board status to CLOSED and record the end_time date:time
           * You can only close boards with all tasks marked as COMPLETE
+          * A board that is already CLOSED cannot be closed again
         """
         pass
 
@@ -60,6 +61,31 @@ class ProjectBoardBase:
         """
         pass
 
+    # add many tasks at once
+    def add_tasks(self, request: str) -> str:
+        """
+        :param request: A json string with the details of the tasks, each one as in add_task
+        {
+            "tasks" : [
+                {
+                    "title" : "<board_name>",
+                    "description" : "<description>",
+                    "user_id" : "<team id>",
+                    "board_id" : "<board id>"
+                }
+            ]
+        }
+        :return: A json list with the response of every task, in the order of the request
+        [
+            {"id" : "<task_id>"} | {"error" : "<reason>"}
+        ]
+
+        Constraint:
+         * same as add_task for every task
+         * all the tasks are persisted with a single write
+        """
+        pass
+
     # update the status of a task
     def update_task_status(self, request: str):
         """
@@ -71,12 +97,166 @@ class ProjectBoardBase:
         """
         pass
 
+    # update the status of many tasks at once
+    def update_task_statuses(self, request: str):
+        """
+        :param request: A json string with the tasks to update
+        {
+            "tasks" : [
+                {
+                    "id" : "<task_id>",
+                    "status" : "OPEN | IN_PROGRESS | COMPLETE"
+                }
+            ]
+        }
+        :return: A json list with the response of every task, in the order of the request
+        """
+        pass
+
+    # list the tasks of a board and/or a user
+    def list_tasks(self, request: str) -> str:
+        """
+        :param request: A json string with the filters, at least one of board_id and user_id is required
+        {
+          "board_id" : "<optional, board id>",
+          "user_id" : "<optional, id of the assigned user>",
+          "status" : "<optional, OPEN | IN_PROGRESS | COMPLETE>"
+        }
+
+        :return: A json list with the matching tasks, in the order they were added
+        [
+          {
+            "id" : "<task_id>",
+            "title" : "<name of the task>",
+            "description" : "<description of the task>",
+            "user_id" : "<id of the assigned user>",
+            "board_id" : "<board id>",
+            "creation_time" : "<date:time when task was created>",
+            "status" : "OPEN | IN_PROGRESS | COMPLETE"
+          }
+        ]
+        """
+        pass
+
+    # search the tasks by the words of their title and description
+    def search_tasks(self, request: str) -> str:
+        """
+        :param request: A json string with the search
+        {
+          "query" : "<words that must all appear in the title or description of the task>",
+          "prefix" : <optional, true to also match the words starting with the query words>,
+          "board_id" : "<optional, only search the tasks of this board>",
+          "team_id" : "<optional, only search the tasks of the boards of this team>",
+          "limit" : <optional, maximum number of results, 20 by default>
+        }
+
+        :return: A json list with the matching tasks, the best matches first. Words in the title weigh more than
+        words in the description, and rare words more than common ones.
+        [
+          {
+            "id" : "<task_id>",
+            "title" : "<name of the task>",
+            "description" : "<description of the task>",
+            "board_id" : "<board id>",
+            "user_id" : "<id of the assigned user>",
+            "status" : "OPEN | IN_PROGRESS | COMPLETE",
+            "score" : <relevance of the task to the query>
+          }
+        ]
+        """
+        pass
+
+    # describe a board
+    def describe_board(self, request: str) -> str:
+        """
+        :param request: A json string with the board identifier
+        {
+          "id" : "<board_id>"
+        }
+
+        :return: A json string with the response
+        {
+          "name" : "<board_name>",
+          "description" : "<description>",
+          "team_id" : "<team id>",
+          "creation_time" : "<date:time when board was created>",
+          "status" : "OPEN | CLOSED",
+          "end_time" : "<date:time when board was closed, only for closed boards>",
+          "task_counts" : {
+            "OPEN" : <number of tasks>,
+            "IN_PROGRESS" : <number of tasks>,
+            "COMPLETE" : <number of tasks>
+          }
+        }
+        """
+        pass
+
+    # the task counters of a board
+    def board_stats(self, request: str) -> str:
+        """
+        :param request: A json string with the board identifier
+        {
+          "id" : "<board_id>"
+        }
+
+        :return: A json string with the response, kept up to date by every change so it does not depend on the
+        number of boards or tasks
+        {
+          "id" : "<board_id>",
+          "team_id" : "<team id>",
+          "status" : "OPEN | CLOSED",
+          "task_counts" : {
+            "OPEN" : <number of tasks>,
+            "IN_PROGRESS" : <number of tasks>,
+            "COMPLETE" : <number of tasks>
+          },
+          "user_counts" : {
+            "<user_id>" : {
+              "assigned" : <number of tasks of the board assigned to the user>,
+              "completed" : <number of those tasks that are COMPLETE>
+            }
+          }
+        }
+        """
+        pass
+
+    # the board and task counters of a team
+    def team_stats(self, request: str) -> str:
+        """
+        :param request: A json string with the team identifier
+        {
+          "id" : "<team_id>"
+        }
+
+        :return: A json string with the response, counting the boards of the team and their tasks like board_stats
+        {
+          "id" : "<team_id>",
+          "board_counts" : {
+            "OPEN" : <number of boards>,
+            "CLOSED" : <number of boards>
+          },
+          "task_counts" : {
+            "OPEN" : <number of tasks>,
+            "IN_PROGRESS" : <number of tasks>,
+            "COMPLETE" : <number of tasks>
+          },
+          "user_counts" : {
+            "<user_id>" : {
+              "assigned" : <number of tasks of the team's boards assigned to the user>,
+              "completed" : <number of those tasks that are COMPLETE>
+            }
+          }
+        }
+        """
+        pass
+
     # list all open boards for a team
     def list_boards(self, request: str) -> str:
         """
         :param request: A json string with the team identifier
         {
-          "id" : "<team_id>"
+          "id" : "<team_id>",
+          "closed" : <optional, true to list the closed boards of the team instead>
         }
 
         :return:
@@ -95,7 +275,8 @@ class ProjectBoardBase:
         We want you to be creative. Output a presentable view of the board and its tasks with the available data.
         :param request:
         {
-          "id" : "<board_id>"
+          "id" : "<board_id>",
+          "format" : "<optional, txt (default) | csv | jsonl>"
         }
         :return:
         {
@@ -103,3 +284,35 @@ class ProjectBoardBase:
         }
         """
         pass
+
+    def export_team_boards(self, request: str) -> str:
+        """
+        Export all the boards of a team, open and closed, like export_board. The boards are exported in parallel by
+        a pool of worker processes.
+        :param request:
+        {
+          "id" : "<team_id>",
+          "format" : "<optional, txt (default) | csv | jsonl>",
+          "workers" : <optional, number of worker processes, from 1 to 64, the number of CPUs by default>
+        }
+        :return:
+        {
+          "out_files" : ["<name of the file created>"]
+        }
+        """
+        pass
+
+    def export_all_boards(self, request: str) -> str:
+        """
+        Export every board like export_team_boards.
+        :param request:
+        {
+          "format" : "<optional, txt (default) | csv | jsonl>",
+          "workers" : <optional, number of worker processes, from 1 to 64, the number of CPUs by default>
+        }
+        :return:
+        {
+          "out_files" : ["<name of the file created>"]
+        }
+        """
+        pass
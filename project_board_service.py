@@ -0,0 +1,411 @@
+import uuid
+import heapq
+import math
+from datetime import datetime
+from data_store import DataStore, TASK_STATUSES, read_operation, write_operation
+from aggregates import empty_team_stats, move_count, count_user_task
+from task_search import tokenize, term_weights
+from board_export import EXPORT_FORMATS, MAX_EXPORT_WORKERS, OUT_DIR, export_board_file, export_board_files
+
+class ProjectBoardService:
+    """
+    Native implementation of the board and task APIs of ProjectBoardBase.
+    Requests and responses are the dicts and lists described in ProjectBoardBase, so in-process callers skip the JSON
+    encoding and decoding that ProjectBoardManager does around every call.
+    """
+
+    def __init__(self, store: DataStore = None):
+        self.store = store or DataStore.default()
+        self.boards = self.store.boards
+        self.tasks = self.store.tasks
+
+    def _is_user_in_team(self, user_id: str, team_id: str) -> bool:
+        """Checks if a user belongs to a given team by looking up the in-memory user to teams mapping."""
+        return self.store.is_member(user_id, team_id)
+
+    @write_operation
+    def create_board(self, data: dict) -> dict:
+        name = data.get("name")
+        if not name:
+            return {"error": "Name is required"}
+        description = data.get("description", "")
+        team_id = data.get("team_id")
+        if not team_id:
+            return {"error": "Team ID is required"}
+        if not isinstance(team_id, str):
+            return {"error": "Team ID must be a string"}
+        creation_time = data.get("creation_time")
+        if not creation_time:
+            return {"error": "Creation time is required"}
+
+        if len(name) > 64 or len(description) > 128:
+            return {"error": "Name or description exceeds character limit"}
+
+        # Ensure the team exists
+        if team_id not in self.store.teams:
+            return {"error": "Team does not exist"}
+
+        # Ensure board name is unique for the team
+        if self.store.boards.find(team_id=team_id, name=name):
+            return {"error": "Board name must be unique for the team"}
+
+        board_id = str(uuid.uuid4())
+        self.store.boards.put(board_id, {
+            "name": name,
+            "description": description,
+            "team_id": team_id,
+            "creation_time": creation_time,
+            "status": "OPEN",
+            "tasks": [],
+            "task_counts": dict.fromkeys(TASK_STATUSES, 0),
+            "user_counts": {}
+        })
+        self._count_board_status(team_id, None, "OPEN")
+        self.store.response_cache.invalidate(("boards", team_id))
+        return {"id": board_id}
+
+    @write_operation
+    def close_board(self, data: dict) -> dict:
+        board_id = data.get("id")
+        if not board_id:
+            return {"error": "Board ID is required"}
+        if not isinstance(board_id, str):
+            return {"error": "Board ID must be a string"}
+
+        board = self.boards.get(board_id)
+        if not board:
+            return {"error": "Board not found"}
+        if board["status"] == "CLOSED":
+            return {"error": "Board is already closed"}
+
+        task_counts = board["task_counts"]
+        if task_counts["OPEN"] or task_counts["IN_PROGRESS"]:
+            return {"error": "Cannot close board with incomplete tasks"}
+
+        self.store.boards.update(board_id, {"status": "CLOSED", "end_time": datetime.now().isoformat()})
+        self._count_board_status(board["team_id"], "OPEN", "CLOSED")
+        self.store.response_cache.invalidate(("boards", board["team_id"]))
+        return {"status": "Board closed successfully"}
+
+    @write_operation
+    def add_task(self, data: dict) -> dict:
+        title = data.get("title")
+        if not title:
+            return {"error": "Title is required"}
+        description = data.get("description", "")
+        user_id = data.get("user_id")
+        if not user_id:
+            return {"error": "User ID is required"}
+        board_id = data.get("board_id")
+        if not board_id:
+            return {"error": "Board ID is required"}
+        if not isinstance(user_id, str) or not isinstance(board_id, str):
+            return {"error": "User ID and board ID must be strings"}
+        if not isinstance(title, str) or not isinstance(description, str):
+            return {"error": "Title and description must be strings"}
+
+        if len(title) > 64:
+            return {"error": "Title exceeds character limit of 64"}
+            
+        if len(description) > 128:
+            return {"error": "Description exceeds character limit of 64"}
+
+        board = self.boards.get(board_id)
+        if not board or board["status"] != "OPEN":
+            return {"error": "Can only add tasks to an open board"}
+
+        # Get the team ID for the board
+        team_id = board.get("team_id")
+        # Validate if the user is part of the board's team
+        if not self._is_user_in_team(user_id, team_id):
+            return {"error": "User is not a member of the board's team"}
+
+        if self.store.tasks.find(board_id=board_id, title=title):
+            return {"error": "Task title must be unique for the board"}
+
+        task_id = str(uuid.uuid4())
+        task = {
+            "title": title,
+            "description": description,
+            "user_id": user_id,
+            "board_id": board_id,
+            "creation_time": datetime.now().isoformat(),
+            "status": "OPEN"
+        }
+        # Computed before the first write so that no write is left without the others
+        weights = term_weights(task)
+        self.store.tasks.put(task_id, task)
+        self.store.boards.append(board_id, "tasks", task_id)
+        self.store.add_user_task(user_id, task_id)
+        self.store.index_task(task_id, task, weights)
+        self._count_task_status(board_id, user_id, None, "OPEN")
+        return {"id": task_id}
+
+    @write_operation
+    def add_tasks(self, data: dict):
+        tasks = data.get("tasks")
+        if not tasks:
+            return {"error": "Tasks are required"}
+
+        with self.store.batch():
+            return [self.add_task(task) for task in tasks]
+
+    @write_operation
+    def update_task_status(self, data: dict) -> dict:
+        task_id = data.get("id")
+        status = data.get("status")
+        if task_id is not None and not isinstance(task_id, str):
+            return {"error": "Task ID must be a string"}
+
+        task = self.tasks.get(task_id)
+        if not task:
+            return {"error": "Task not found"}
+
+        if status not in TASK_STATUSES:
+            return {"error": "Invalid status"}
+
+        old_status = task["status"]
+        if status != old_status:
+            self.store.tasks.update(task_id, {"status": status})
+            self.store.move_user_task(task["user_id"], task_id, old_status, status)
+            self._count_task_status(task["board_id"], task["user_id"], old_status, status)
+        return {"status": "Task status updated successfully"}
+
+    @write_operation
+    def update_task_statuses(self, data: dict):
+        tasks = data.get("tasks")
+        if not tasks:
+            return {"error": "Tasks are required"}
+
+        with self.store.batch():
+            return [self.update_task_status(task) for task in tasks]
+
+    def _team_stats(self, team_id: str) -> dict:
+        return self.store.team_stats.get(team_id) or empty_team_stats()
+
+    def _count_board_status(self, team_id: str, old_status, new_status: str):
+        """Move one board between the per-status board counters of its team."""
+        board_counts = move_count(self._team_stats(team_id)["board_counts"], old_status, new_status)
+        self.store.update_team_stats(team_id, {"board_counts": board_counts})
+
+    def _count_task_status(self, board_id: str, user_id: str, old_status, new_status: str):
+        """Move one task between the per-status counters of its board and team, and of its user in both."""
+        board = self.boards[board_id]
+        self.store.boards.update(board_id, {
+            "task_counts": move_count(board["task_counts"], old_status, new_status),
+            "user_counts": count_user_task(board.get("user_counts", {}), user_id, old_status, new_status)
+        })
+        team_stats = self._team_stats(board["team_id"])
+        self.store.update_team_stats(board["team_id"], {
+            "task_counts": move_count(team_stats["task_counts"], old_status, new_status),
+            "user_counts": count_user_task(team_stats["user_counts"], user_id, old_status, new_status)
+        })
+
+    @read_operation
+    def list_tasks(self, data: dict):
+        board_id = data.get("board_id")
+        user_id = data.get("user_id")
+        status = data.get("status")
+        if not board_id and not user_id:
+            return {"error": "Board ID or user ID is required"}
+        if status is not None and status not in TASK_STATUSES:
+            return {"error": "Invalid status"}
+
+        if board_id:
+            board = self.boards.get(board_id)
+            if not board:
+                return {"error": "Board not found"}
+            if user_id:
+                task_ids = self.tasks.find(board_id=board_id, user_id=user_id)
+            elif status:
+                task_ids = self.tasks.find(board_id=board_id, status=status)
+            else:
+                task_ids = board["tasks"]
+        else:
+            if user_id not in self.store.users:
+                return {"error": "User not found"}
+            user_tasks = self.store.user_tasks.get(user_id, {})
+            task_ids = [task_id for task_status in ([status] if status else TASK_STATUSES)
+                        for task_id in user_tasks.get(task_status, ())]
+
+        response = []
+        for task_id in task_ids:
+            task = self.tasks.get(task_id)
+            if task and (not status or task["status"] == status):
+                response.append({"id": task_id, **task})
+        if not board_id:
+            # The tasks of a user are kept by status, their creation times restore the order they were added in
+            response.sort(key=lambda task: task["creation_time"])
+        return response
+
+    def _term_postings(self, term: str, prefix: bool) -> dict:
+        """Map the ids of the tasks containing the term (or a term starting with it) to (board_id, weight)."""
+        postings = {}
+        for index_term in self.store.terms_with_prefix(term) if prefix else [term]:
+            for task_id, board_id, weight in self.store.search_index.get(index_term):
+                _, previous_weight = postings.get(task_id, (board_id, 0))
+                postings[task_id] = (board_id, previous_weight + weight)
+        return postings
+
+    @read_operation
+    def search_tasks(self, data: dict):
+        query = data.get("query")
+        if not query or not isinstance(query, str):
+            return {"error": "Query is required"}
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return {"error": "Query must contain at least one word"}
+
+        board_id = data.get("board_id")
+        if board_id and board_id not in self.boards:
+            return {"error": "Board not found"}
+        team_id = data.get("team_id")
+        if team_id and team_id not in self.store.teams:
+            return {"error": "Team not found"}
+        limit = data.get("limit", 20)
+        if not isinstance(limit, int) or limit <= 0:
+            return {"error": "Limit must be a positive integer"}
+
+        # Tasks must contain every term, starting from the rarest term keeps the candidate set small
+        postings = sorted((self._term_postings(term, bool(data.get("prefix"))) for term in terms), key=len)
+        task_count = len(self.tasks) or 1
+        scores = {}
+        for task_id, (task_board_id, weight) in postings[0].items():
+            if board_id and task_board_id != board_id:
+                continue
+            if team_id and self.boards[task_board_id]["team_id"] != team_id:
+                continue
+            if all(task_id in term_postings for term_postings in postings[1:]):
+                # Weight of the terms in the task, scaled by how rare every term is among all the tasks
+                scores[task_id] = sum(term_postings[task_id][1] * math.log(1 + task_count / len(term_postings))
+                                      for term_postings in postings)
+
+        response = []
+        for task_id in heapq.nlargest(limit, scores, key=scores.get):
+            task = self.tasks[task_id]
+            response.append({
+                "id": task_id,
+                "title": task["title"],
+                "description": task["description"],
+                "board_id": task["board_id"],
+                "user_id": task["user_id"],
+                "status": task["status"],
+                "score": round(scores[task_id], 4)
+            })
+        return response
+
+    @read_operation
+    def describe_board(self, data: dict) -> dict:
+        board_id = data.get("id")
+        if not board_id:
+            return {"error": "Board ID is required"}
+
+        board = self.boards.get(board_id)
+        if not board:
+            return {"error": "Board not found"}
+
+        response = {
+            "name": board["name"],
+            "description": board["description"],
+            "team_id": board["team_id"],
+            "creation_time": board["creation_time"],
+            "status": board["status"],
+            "task_counts": dict(board["task_counts"])
+        }
+        if "end_time" in board:
+            response["end_time"] = board["end_time"]
+
+        return response
+
+    @read_operation
+    def board_stats(self, data: dict) -> dict:
+        board_id = data.get("id")
+        if not board_id:
+            return {"error": "Board ID is required"}
+
+        board = self.boards.get(board_id)
+        if not board:
+            return {"error": "Board not found"}
+
+        return {
+            "id": board_id,
+            "team_id": board["team_id"],
+            "status": board["status"],
+            "task_counts": dict(board["task_counts"]),
+            "user_counts": {user_id: dict(counts) for user_id, counts in board.get("user_counts", {}).items()}
+        }
+
+    @read_operation
+    def team_stats(self, data: dict) -> dict:
+        team_id = data.get("id")
+        if not team_id:
+            return {"error": "Team ID is required"}
+        if team_id not in self.store.teams:
+            return {"error": "Team not found"}
+
+        team_stats = self._team_stats(team_id)
+        return {
+            "id": team_id,
+            "board_counts": dict(team_stats["board_counts"]),
+            "task_counts": dict(team_stats["task_counts"]),
+            "user_counts": {user_id: dict(counts) for user_id, counts in team_stats["user_counts"].items()}
+        }
+
+    @read_operation
+    def list_boards(self, data: dict):
+        team_id = data.get("id")
+        if not team_id:
+            return {"error": "Team ID is required"}
+
+        status = "CLOSED" if data.get("closed") else "OPEN"
+        return [{"id": board_id, "name": self.boards[board_id]["name"]}
+                for board_id in self.store.boards.find(team_id=team_id, status=status)]
+
+    def _board_tasks(self, board: dict):
+        for task_id in board["tasks"]:
+            task = self.tasks.get(task_id)
+            if task:
+                yield task_id, task
+
+    @read_operation
+    def export_board(self, data: dict) -> dict:
+        board_id = data.get("id")
+        export_format = data.get("format", "txt")
+        if export_format not in EXPORT_FORMATS:
+            return {"error": f"Export format must be one of {', '.join(EXPORT_FORMATS)}"}
+
+        board = self.boards.get(board_id)
+        if not board:
+            return {"error": "Board not found"}
+
+        return {"out_file": export_board_file(board_id, board, self._board_tasks(board), export_format)}
+
+    def _export_boards(self, board_ids, data: dict) -> dict:
+        export_format = data.get("format", "txt")
+        if export_format not in EXPORT_FORMATS:
+            return {"error": f"Export format must be one of {', '.join(EXPORT_FORMATS)}"}
+        workers = data.get("workers")
+        if workers is not None and (not isinstance(workers, int) or isinstance(workers, bool) or
+                                    not 0 < workers <= MAX_EXPORT_WORKERS):
+            return {"error": f"Workers must be an integer between 1 and {MAX_EXPORT_WORKERS}"}
+
+        # The worker processes only format and write, the records are read here from the shared store
+        jobs = ((board_id, self.boards[board_id], list(self._board_tasks(self.boards[board_id])), export_format,
+                 OUT_DIR) for board_id in board_ids)
+        return {"out_files": export_board_files(jobs, workers)}
+
+    @read_operation
+    def export_team_boards(self, data: dict) -> dict:
+        team_id = data.get("id")
+        if not team_id:
+            return {"error": "Team ID is required"}
+        if team_id not in self.store.teams:
+            return {"error": "Team not found"}
+
+        board_ids = (self.boards.find(team_id=team_id, status="OPEN") +
+                     self.boards.find(team_id=team_id, status="CLOSED"))
+        return self._export_boards(board_ids, data)
+
+    @read_operation
+    def export_all_boards(self, data: dict) -> dict:
+        return self._export_boards(list(self.boards.keys()), data)
@@ -0,0 +1,62 @@
+import json
+from data_store import DataStore
+from planner_api import api_methods
+
+
+def replay(store: DataStore, lines, out, group_size: int = 1000) -> dict:
+    """
+    Run a workload of JSON lines `{"api": "<name>", "payload": {...}}` against the store and write one line
+    `{"api": "<name>", "response": ...}` per request to `out`, in the order of the requests.
+
+    The requests call the services directly, so the payloads and responses are not encoded to JSON strings and back
+    on their way through the managers. Every `group_size` requests run in one DataStore.batch() block and their log
+    records are written together; the responses of a group are only written once its records are on disk. A request
+    that fails (e.g. a payload that is not an object) gets an error response like the server's, the others go on.
+
+    Returns the number of requests and of error responses.
+    """
+    apis = api_methods(store)
+    summary = {"requests": 0, "errors": 0}
+    group = []
+
+    def run_group():
+        with store.batch():
+            responses = [run_request(line) for line in group]
+        out.writelines(json.dumps(response) + "\n" for response in responses)
+        group.clear()
+
+    def run_request(line) -> dict:
+        summary["requests"] += 1
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            message = None
+        if not isinstance(message, dict):
+            summary["errors"] += 1
+            return {"api": None, "response": {"error": "Request is not a JSON object"}}
+
+        api = message.get("api")
+        method = apis.get(api)
+        try:
+            if method is None:
+                response = {"error": f"Unknown API: {api}"}
+            elif "payload" in message:
+                response = method(message["payload"])
+            else:
+                response = method()
+        except (AttributeError, KeyError, TypeError):
+            response = {"error": "Malformed request"}
+        except Exception as error:
+            response = {"error": f"Request failed: {error}"}
+        if isinstance(response, dict) and "error" in response:
+            summary["errors"] += 1
+        return {"api": api, "response": response}
+
+    for line in lines:
+        if line.strip():
+            group.append(line)
+            if len(group) >= group_size:
+                run_group()
+    if group:
+        run_group()
+    return summary
@@ -0,0 +1,105 @@
+import json
+import functools
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    A bounded LRU cache of serialized API responses.
+
+    Every entry is stored with tags naming the data it was built from, e.g. ("team", team_id) or ("teams",) for the
+    list of all teams. A write operation calls invalidate() with the tags of the data it changed, which drops exactly
+    the entries built from that data.
+
+    At most `max_entries` responses are kept, the least recently used are dropped first. Responses longer than
+    `max_response_chars` (full listings of large collections) are not cached.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_response_chars: int = 1000000):
+        self.max_entries = max_entries
+        self.max_response_chars = max_response_chars
+        self._entries = OrderedDict()
+        self._keys_by_tag = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, response: str, tags):
+        if self.max_entries <= 0 or len(response) > self.max_response_chars:
+            return
+        if key in self._entries:
+            self._remove(key)
+        tags = tuple(tags)
+        self._entries[key] = (response, tags)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def invalidate(self, *tags):
+        """Drop the responses built from any of the tagged data."""
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, ()):
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidated += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def report(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "invalidated": self.invalidated
+        }
+
+
+def cached_response(tags):
+    """
+    Serve a read API of a manager from the response cache of its store, keyed by the API name and the request string.
+    On a miss the API is called and its response cached under `tags(store, request_data)`, unless it is an error.
+    """
+    def decorator(method):
+        api = method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, request: str = None) -> str:
+            # Drops the cache when other processes changed the data
+            self.store.refresh()
+            cache = self.store.response_cache
+            key = (api, request)
+            response = cache.get(key)
+            if response is None:
+                response = method(self, request)
+                if not response.startswith('{"error"'):
+                    cache.put(key, response, tags(self.store, json.loads(request) if request else {}))
+            return response
+        return wrapper
+    return decorator
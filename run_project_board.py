@@ -12,9 +12,12 @@ def main():
         print("4. Update Task Status")
         print("5. List Boards")
         print("6. Export Board")
-        print("7. Exit")
+        print("7. Describe Board")
+        print("8. Board Stats")
+        print("9. Team Stats")
+        print("10. Exit")
         
-        choice = input("Enter choice (1-7): ")
+        choice = input("Enter choice (1-10): ")
         
         if choice == "1":
             name = input("Enter board name: ")
@@ -45,20 +48,37 @@ def main():
         
         elif choice == "5":
             team_id = input("Enter team ID to list boards: ")
-            request = json.dumps({"id": team_id})
+            closed = input("List closed boards instead? (y/N): ").strip().lower() == "y"
+            request = json.dumps({"id": team_id, "closed": closed})
             print(manager.list_boards(request))
         
         elif choice == "6":
             board_id = input("Enter board ID to export: ")
-            request = json.dumps({"id": board_id})
+            export_format = input("Enter format (txt, csv, jsonl) [txt]: ").strip() or "txt"
+            request = json.dumps({"id": board_id, "format": export_format})
             print(manager.export_board(request))
         
         elif choice == "7":
+            board_id = input("Enter board ID to describe: ")
+            request = json.dumps({"id": board_id})
+            print(manager.describe_board(request))
+        
+        elif choice == "8":
+            board_id = input("Enter board ID: ")
+            request = json.dumps({"id": board_id})
+            print(manager.board_stats(request))
+        
+        elif choice == "9":
+            team_id = input("Enter team ID: ")
+            request = json.dumps({"id": team_id})
+            print(manager.team_stats(request))
+        
+        elif choice == "10":
             print("Exiting...")
             break
         
         else:
-            print("Invalid choice. Please enter a number between 1 and 7.")
+            print("Invalid choice. Please enter a number between 1 and 10.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,33 @@
+import sys
+import time
+import argparse
+from data_store import DataStore
+from replay import replay
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL workload of {\"api\", \"payload\"} requests")
+    parser.add_argument("input", help="JSONL file of requests, - for stdin")
+    parser.add_argument("--output", default="-", help="JSONL file for the responses, - for stdout")
+    parser.add_argument("--db", default="db", help="Data directory")
+    parser.add_argument("--backend", choices=["file", "sqlite"], default="file")
+    parser.add_argument("--group-size", type=int, default=1000, help="Requests written to disk together")
+    args = parser.parse_args()
+
+    store = DataStore(args.db, backend=args.backend)
+    source = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    start = time.perf_counter()
+    try:
+        summary = replay(store, source, out, args.group_size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if source is not sys.stdin:
+            source.close()
+        store.close()
+    elapsed = time.perf_counter() - start
+    print(f"{summary['requests']} requests, {summary['errors']} errors in {elapsed:.2f} s "
+          f"({summary['requests'] / elapsed:.0f} requests/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import asyncio
+import argparse
+from data_store import DataStore
+from planner_server import PlannerServer
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the planner APIs as newline-delimited JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--db", default="db", help="Data directory")
+    parser.add_argument("--backend", choices=["file", "sqlite"], default="file")
+    args = parser.parse_args()
+
+    server = PlannerServer(DataStore(args.db, backend=args.backend))
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
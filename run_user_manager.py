@@ -11,7 +11,8 @@ def main():
         print("2. List Users")
         print("3. Describe User")
         print("4. Update User")
-        print("5. Exit")
+        print("5. Get User Teams")
+        print("6. Exit")
         
         choice = input("Enter your choice: ")
         
@@ -37,6 +38,11 @@ def main():
             print("Response:", user_manager.update_user(request))
         
         elif choice == "5":
+            user_id = input("Enter User ID: ")
+            request = json.dumps({"id": user_id})
+            print("Response:", user_manager.get_user_teams(request))
+        
+        elif choice == "6":
             print("Exiting...")
             break
         
@@ -0,0 +1,204 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from storage import Collection, ListCollection
+
+
+class SqliteDatabase:
+    """
+    A SQLite database file holding one table per collection.
+    The database runs in WAL journal mode and commits every write, unless it is made inside a batch() block, in which
+    case the whole block is a single transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._batch_depth = 0
+
+    def collection(self, name: str) -> "SqliteStore":
+        return SqliteStore(self, name)
+
+    def list_collection(self, name: str) -> "SqliteListStore":
+        return SqliteListStore(self, name)
+
+    def execute(self, sql: str, parameters=()):
+        return self.connection.execute(sql, parameters)
+
+    @contextmanager
+    def batch(self):
+        if not self._batch_depth:
+            self.connection.execute("BEGIN")
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.connection.execute("ROLLBACK")
+            raise
+        else:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.connection.execute("COMMIT")
+
+    def flush(self):
+        """Commit the transaction of the current batch and carry on with a new one."""
+        if self._batch_depth:
+            self.connection.execute("COMMIT")
+            self.connection.execute("BEGIN")
+
+    def close(self):
+        self.connection.close()
+
+
+class SqliteStore(Collection):
+    """
+    A collection stored in a table of a SqliteDatabase.
+
+    Every record is stored as JSON text next to its id. The fields declared with add_index() are also copied into
+    columns of their own with an index over them, so find() is answered by the database. Nothing is loaded into memory
+    up front, records are read and decoded when they are accessed.
+    """
+
+    def __init__(self, database: SqliteDatabase, name: str):
+        self.database = database
+        self.table = name
+        self._indexed_fields = []
+        self.database.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, record TEXT NOT NULL)")
+
+    def add_index(self, *fields: str):
+        fields = tuple(sorted(fields))
+        columns = {row[1] for row in self.database.execute(f"PRAGMA table_info({self.table})")}
+        for field in fields:
+            if field not in self._indexed_fields:
+                self._indexed_fields.append(field)
+            if field not in columns:
+                self.database.execute(f"ALTER TABLE {self.table} ADD COLUMN {field}")
+                self.database.execute(f"UPDATE {self.table} SET {field} = json_extract(record, '$.{field}')")
+        self.database.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_{'_'.join(fields)} "
+                              f"ON {self.table} ({', '.join(fields)})")
+
+    def find(self, **criteria) -> list:
+        fields = sorted(criteria)
+        where = " AND ".join(f"{field} = ?" for field in fields)
+        rows = self.database.execute(f"SELECT id FROM {self.table} WHERE {where} ORDER BY rowid",
+                                     [criteria[field] for field in fields])
+        return [row[0] for row in rows]
+
+    def get(self, key: str, default=None):
+        row = self.database.execute(f"SELECT record FROM {self.table} WHERE id = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __contains__(self, key: str) -> bool:
+        return self.database.execute(f"SELECT 1 FROM {self.table} WHERE id = ?", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.database.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def items(self):
+        for key, record in self.database.execute(f"SELECT id, record FROM {self.table} ORDER BY rowid"):
+            yield key, json.loads(record)
+
+    def scan(self, after: int = 0, rows_per_query: int = 1000):
+        """The cursor of a record is its rowid. Rows are read in short queries, each seeking past the last rowid."""
+        while True:
+            rows = self.database.execute(f"SELECT rowid, id, record FROM {self.table} WHERE rowid > ? "
+                                         f"ORDER BY rowid LIMIT ?", (after, rows_per_query)).fetchall()
+            if not rows:
+                return
+            for rowid, key, record in rows:
+                yield rowid, key, json.loads(record)
+            after = rows[-1][0]
+
+    def put(self, key: str, record):
+        columns = ["id", "record"] + self._indexed_fields
+        values = [key, json.dumps(record)] + [record.get(field) for field in self._indexed_fields]
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        self.database.execute(f"INSERT INTO {self.table} ({', '.join(columns)}) "
+                              f"VALUES ({', '.join('?' * len(columns))}) "
+                              f"ON CONFLICT(id) DO UPDATE SET {assignments}", values)
+
+    def update(self, key: str, fields: dict):
+        record = self[key]
+        record.update(fields)
+        self._replace(key, record)
+
+    def append(self, key: str, field: str, value):
+        record = self[key]
+        record.setdefault(field, []).append(value)
+        self._replace(key, record)
+
+    def remove(self, key: str, field: str, value):
+        record = self[key]
+        if value in record.get(field, []):
+            record[field].remove(value)
+            self._replace(key, record)
+
+    def _replace(self, key: str, record: dict):
+        columns = ["record"] + self._indexed_fields
+        values = [json.dumps(record)] + [record.get(field) for field in self._indexed_fields] + [key]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        self.database.execute(f"UPDATE {self.table} SET {assignments} WHERE id = ?", values)
+
+    def delete(self, key: str):
+        self.database.execute(f"DELETE FROM {self.table} WHERE id = ?", (key,))
+
+    def batch(self):
+        return self.database.batch()
+
+    def flush(self):
+        self.database.flush()
+
+    def checkpoint(self):
+        self.database.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def refresh(self) -> bool:
+        # Records are read from the database on every access, so other processes' commits are always visible
+        return False
+
+
+class SqliteListStore(ListCollection):
+    """
+    A ListCollection stored in a table of a SqliteDatabase with one row per value, indexed by key, so adding a value
+    is a single insert and reading a list only reads its own rows.
+    """
+
+    def __init__(self, database: SqliteDatabase, name: str):
+        self.database = database
+        self.table = name
+        self.database.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT NOT NULL, value TEXT NOT NULL)")
+        self.database.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_key ON {self.table} (key)")
+
+    def get(self, key: str) -> list:
+        rows = self.database.execute(f"SELECT value FROM {self.table} WHERE key = ? ORDER BY rowid", (key,))
+        # Decoded as one JSON list rather than value by value
+        return json.loads("[" + ",".join(row[0] for row in rows) + "]")
+
+    def add(self, key: str, value):
+        self.database.execute(f"INSERT INTO {self.table} (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def keys(self):
+        for row in self.database.execute(f"SELECT DISTINCT key FROM {self.table} ORDER BY key"):
+            yield row[0]
+
+    def __bool__(self) -> bool:
+        return self.database.execute(f"SELECT 1 FROM {self.table} LIMIT 1").fetchone() is not None
+
+    def batch(self):
+        return self.database.batch()
+
+    def flush(self):
+        self.database.flush()
+
+    def checkpoint(self):
+        self.database.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def refresh(self) -> bool:
+        # Values are read from the database on every access
+        return False
+
+    def close(self):
+        pass
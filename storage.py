@@ -0,0 +1,834 @@
+import os
+import sys
+import json
+import pickle
+import struct
+import time
+import zlib
+from contextlib import contextmanager, ExitStack
+from itertools import islice
+from instrumentation import stats
+
+# Binary snapshot header: magic, format version, CRC32 and length of the pickled payload
+SNAPSHOT_MAGIC = b"PLANSNP"
+# Version 2 payloads are (generation, data), version 1 payloads are only the data of generation 0
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("<7sBIQ")
+
+
+class CorruptSnapshotError(Exception):
+    """A binary snapshot that is more recent than the JSON snapshot cannot be read."""
+
+
+def _tmp_path(path: str) -> str:
+    """A temporary file to write `path` to before renaming it, private to this process."""
+    return f"{path}.{os.getpid()}.tmp"
+
+
+def _encode(record) -> str:
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def write_binary_snapshot(path: str, data: dict, generation: int = 0):
+    payload = pickle.dumps((generation, data), protocol=5)
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, zlib.crc32(payload), len(payload)))
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_binary_snapshot(path: str):
+    """Return the (generation, data) of a binary snapshot, or None if it is missing, of another version or corrupt."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(SNAPSHOT_HEADER.size)
+            payload = f.read()
+    except FileNotFoundError:
+        return None
+    if len(header) != SNAPSHOT_HEADER.size:
+        return None
+    magic, version, checksum, length = SNAPSHOT_HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC or version not in (1, SNAPSHOT_VERSION) or length != len(payload):
+        return None
+    if zlib.crc32(payload) != checksum:
+        return None
+    if version == 1:
+        return 0, pickle.loads(payload)
+    return pickle.loads(payload)
+
+
+def read_json_snapshot(path: str):
+    """
+    Return the (generation, data) of a JSON snapshot. Snapshots start with a ["snapshot", <generation>] line, the
+    ones written before generations existed are a single JSON object and belong to generation 0.
+    """
+    with open(path, "r") as f:
+        text = f.read()
+    if not text.lstrip().startswith("["):
+        return 0, json.loads(text)
+    header, _, body = text.partition("\n")
+    return json.loads(header)[1], json.loads(body)
+
+
+class Collection:
+    """
+    Interface of a collection of JSON records keyed by id, implemented by the storage backends.
+    Records returned by a collection must be treated as read-only, changes go through put/update/append/delete.
+    """
+
+    def get(self, key: str, default=None):
+        pass
+
+    def __contains__(self, key: str) -> bool:
+        pass
+
+    def __len__(self) -> int:
+        pass
+
+    def items(self):
+        """Iterate over the (id, record) pairs in insertion order."""
+        pass
+
+    def scan(self, after: int = 0):
+        """
+        Iterate over the (cursor, id, record) triples in insertion order, starting after the record of the given
+        cursor (0 for the first record). Cursors are increasing integers, resuming from one seeks to it directly.
+        """
+        for position, (key, record) in enumerate(islice(self.items(), after, None), after + 1):
+            yield position, key, record
+
+    def put(self, key: str, record):
+        """Insert or replace a record."""
+        pass
+
+    def update(self, key: str, fields: dict):
+        """Set some fields of an existing record."""
+        pass
+
+    def append(self, key: str, field: str, value):
+        """Append a value to a list field of an existing record."""
+        pass
+
+    def remove(self, key: str, field: str, value):
+        """Remove a value from a list field of an existing record, if it is in the list."""
+        pass
+
+    def delete(self, key: str):
+        pass
+
+    def add_index(self, *fields: str):
+        """Declare an index on the given record fields, e.g. add_index("board_id", "title")."""
+        pass
+
+    def find(self, **criteria) -> list:
+        """
+        Return the ids of the records whose fields equal the given values, in insertion order.
+        The combination of fields must have been declared with add_index().
+        """
+        pass
+
+    def batch(self):
+        """Context manager grouping the writes made inside the block into a single write."""
+        pass
+
+    def flush(self):
+        """Write the records of the current batch now, without ending the batch."""
+        pass
+
+    def checkpoint(self):
+        pass
+
+    def refresh(self) -> bool:
+        """Pick up the changes other processes committed to the storage, return whether there were any."""
+        pass
+
+    def close(self):
+        pass
+
+    def __getitem__(self, key: str):
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def values(self):
+        return (record for _, record in self.items())
+
+
+class LogStore(Collection):
+    """
+    A collection of JSON records keyed by id, persisted as a snapshot file plus an append-only operation log.
+
+    Every mutation appends one compact record to the log instead of rewriting the snapshot, so the cost of a
+    write is proportional to the change and not to the size of the collection. The log is replayed on top of
+    the snapshot when the store is loaded, and folded back into the snapshot once it holds at least `checkpoint_every`
+    operations and is at least as large as the snapshot. A checkpoint rewrites the whole collection, so tying it to
+    the log size keeps its cost spread over writes proportional to it, however large the collection grows, and bounds
+    the log replayed at load time to the size of the snapshot.
+
+    Log records are JSON arrays, one per line, after a header naming the generation of the snapshot they apply to:
+    ["snapshot", <generation>]            header, every checkpoint writes the next generation
+    ["put", "<id>", {record}]             insert or replace a record
+    ["update", "<id>", {fields}]          set some fields of a record
+    ["append", "<id>", "<field>", value]  append a value to a list field of a record
+    ["remove", "<id>", "<field>", value]  remove a value from a list field of a record
+    ["delete", "<id>"]                    remove a record
+
+    Secondary hash indexes can be declared on record fields with add_index(). They are built from the loaded data
+    and kept up to date by every mutation, so find() answers equality lookups without scanning the collection.
+
+    Mutations made inside a batch() block are applied to memory immediately, but their log records are written
+    together with a single write when the outermost block exits.
+
+    `snapshot_format` selects what a checkpoint writes: "json" (default), "binary" or "both". The binary snapshot
+    (`<name>.snap`, pickle protocol 5 with a version header and checksum) loads several times faster than the JSON,
+    and is preferred at load time when it is at least as recent as the JSON file. If it cannot be read, the JSON file
+    is only loaded instead when it is of the same generation, otherwise loading raises CorruptSnapshotError rather
+    than silently losing the records of the binary snapshot.
+
+    Ids repeat across the collections (as keys, in reference fields like a task's board_id and in lists like a
+    board's tasks). Keys, the fields named in `intern_fields` and records that are ids or lists of ids themselves are
+    interned with sys.intern(), so every id is held in memory once however many records refer to it.
+
+    refresh() catches up with the writes of other processes: records appended to the log since it was last read are
+    replayed, and a log replaced by another process's checkpoint (new inode) triggers a full reload. Writers must
+    hold a lock shared by the processes, see DataStore.write_lock().
+    """
+
+    def __init__(self, path: str, checkpoint_every: int = 1000, snapshot_format: str = "json",
+                 intern_fields: tuple = (), keep_log_open: bool = True):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log"
+        self.snapshot_path = os.path.splitext(path)[0] + ".snap"
+        self.checkpoint_every = checkpoint_every
+        self.snapshot_format = snapshot_format
+        self.intern_fields = intern_fields
+        # Stores that are written to rarely (e.g. one of many shards) close their log after every write
+        self.keep_log_open = keep_log_open
+        self._log = None
+        self._log_ops = 0
+        self._log_offset = 0
+        self._log_inode = None
+        # Size of the snapshot file(s) loaded or last written, the log is checkpointed when it outgrows them
+        self._snapshot_bytes = 0
+        # Generation of the loaded snapshot, and whether the log belongs to an older one
+        self._generation = 0
+        self._stale_log = False
+        self._indexes = {}
+        # The keys in insertion order for scan(), built on first use and extended by new records
+        self._key_list = None
+        self._batch_depth = 0
+        self._pending = []
+        self._load()
+
+    @property
+    def generation(self) -> int:
+        """The generation of the loaded snapshot, 0 before the first checkpoint and for snapshots without a header."""
+        return self._generation
+
+    def _load(self):
+        start = time.perf_counter()
+        snapshot = self._load_binary_snapshot()
+        snapshot_path = self.snapshot_path
+        if snapshot is None:
+            snapshot_path = self.path
+            try:
+                snapshot = read_json_snapshot(self.path)
+            except (FileNotFoundError, json.JSONDecodeError):
+                snapshot = 0, {}
+                snapshot_path = None
+        self._generation, self.data = snapshot
+        self._snapshot_bytes = os.path.getsize(snapshot_path) if snapshot_path else 0
+        if stats.enabled and snapshot_path:
+            stats.record_io(snapshot_path, bytes_read=self._snapshot_bytes, load_s=time.perf_counter() - start)
+        self.data = {sys.intern(key): self._intern_record(record) for key, record in self.data.items()}
+
+        self._log_offset = 0
+        self._log_inode = None
+        self._stale_log = False
+        self._key_list = None
+        self._replay_log()
+
+    def _replay_log(self):
+        """Apply the records of the log from the current offset on."""
+        try:
+            f = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return
+        start, start_offset = time.perf_counter(), self._log_offset
+        with f:
+            self._log_inode = os.fstat(f.fileno()).st_ino
+            f.seek(self._log_offset)
+            at_start = not self._log_offset
+            for line in f:
+                try:
+                    op = json.loads(line) if line.endswith(b"\n") else None
+                except json.JSONDecodeError:
+                    op = None
+                if op is None:
+                    # A torn write at the tail of the log, or one still in progress in another process.
+                    # It is cut off before this store appends to the log.
+                    break
+                if at_start:
+                    at_start = False
+                    # Logs written before generations existed have no header and belong to generation 0
+                    log_generation = op[1] if op[0] == "snapshot" else 0
+                    if log_generation < self._generation:
+                        # A checkpoint was interrupted after writing its snapshot: the whole log is already folded
+                        # into it. The log is replaced before this store appends to it.
+                        self._stale_log = True
+                        self._log_offset = os.fstat(f.fileno()).st_size
+                        break
+                    if op[0] == "snapshot":
+                        self._log_offset += len(line)
+                        continue
+                self._apply(op)
+                self._log_ops += 1
+                self._log_offset += len(line)
+        if stats.enabled:
+            stats.record_io(self.log_path, bytes_read=self._log_offset - start_offset,
+                            load_s=time.perf_counter() - start)
+
+    def refresh(self) -> bool:
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return False
+        if stat.st_ino != self._log_inode:
+            self._reload()
+            return True
+        if stat.st_size > self._log_offset:
+            self._replay_log()
+            return True
+        return False
+
+    def _reload(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        index_fields = list(self._indexes)
+        self._indexes = {}
+        self._log_ops = 0
+        self._load()
+        for fields in index_fields:
+            self.add_index(*fields)
+
+    def _load_binary_snapshot(self):
+        try:
+            snapshot_mtime = os.stat(self.snapshot_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        try:
+            json_mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            json_mtime = None
+        if json_mtime is not None and json_mtime > snapshot_mtime:
+            return None
+        snapshot = read_binary_snapshot(self.snapshot_path)
+        # Falling back to the JSON snapshot is only safe when it is of the generation the log applies to, an older
+        # one misses the records folded into the unreadable binary snapshot
+        if snapshot is None and (json_mtime is None or self._json_generation() < self._log_generation()):
+            raise CorruptSnapshotError(f"{self.snapshot_path} is more recent than {self.path} but cannot be read")
+        return snapshot
+
+    def _json_generation(self) -> int:
+        with open(self.path, "r") as f:
+            header = f.readline()
+        return json.loads(header)[1] if header.startswith("[") else 0
+
+    def _log_generation(self) -> int:
+        try:
+            with open(self.log_path, "r") as f:
+                header = f.readline()
+        except FileNotFoundError:
+            return 0
+        return json.loads(header)[1] if header.startswith('["snapshot"') else 0
+
+    def add_index(self, *fields: str):
+        fields = tuple(sorted(fields))
+        self._indexes[fields] = {}
+        for key, record in self.data.items():
+            self._index_record(fields, key, record)
+
+    def find(self, **criteria) -> list:
+        fields = tuple(sorted(criteria))
+        matches = self._indexes[fields].get(tuple(criteria[field] for field in fields))
+        return list(matches) if matches else []
+
+    def _index_record(self, fields: tuple, key: str, record: dict):
+        values = tuple(record.get(field) for field in fields)
+        self._indexes[fields].setdefault(values, {})[key] = None
+
+    def _unindex_record(self, fields: tuple, key: str, record: dict):
+        index = self._indexes[fields]
+        values = tuple(record.get(field) for field in fields)
+        matches = index.get(values)
+        if matches is not None:
+            matches.pop(key, None)
+            if not matches:
+                del index[values]
+
+    def _intern_record(self, record):
+        if isinstance(record, str):
+            return sys.intern(record)
+        if isinstance(record, list):
+            return [sys.intern(value) if isinstance(value, str) else value for value in record]
+        for field in self.intern_fields:
+            value = record.get(field)
+            if isinstance(value, str):
+                record[field] = sys.intern(value)
+            elif isinstance(value, list):
+                record[field] = [sys.intern(item) if isinstance(item, str) else item for item in value]
+        return record
+
+    def _apply(self, op: list):
+        kind, key = op[0], op[1]
+        if isinstance(key, str):
+            key = sys.intern(key)
+        if kind in ("put", "update"):
+            op[2] = self._intern_record(op[2])
+        elif kind == "append" and op[2] in self.intern_fields and isinstance(op[3], str):
+            op[3] = sys.intern(op[3])
+        # Indexes only cover scalar fields, so changes to list fields never touch them
+        reindex = []
+        if self._indexes and kind not in ("append", "remove"):
+            old = self.data.get(key)
+            reindex = [fields for fields in self._indexes if kind != "update" or not op[2].keys().isdisjoint(fields)]
+            if old is not None:
+                for fields in reindex:
+                    self._unindex_record(fields, key, old)
+
+        if kind == "put":
+            if self._key_list is not None and key not in self.data:
+                self._key_list.append(key)
+            self.data[key] = op[2]
+        elif kind == "update":
+            self.data[key].update(op[2])
+        elif kind == "append":
+            self.data[key].setdefault(op[2], []).append(op[3])
+        elif kind == "remove":
+            values = self.data[key].get(op[2], [])
+            if op[3] in values:
+                values.remove(op[3])
+            return
+        elif kind == "delete":
+            self.data.pop(key, None)
+            self._key_list = None
+            return
+
+        for fields in reindex:
+            self._index_record(fields, key, self.data[key])
+
+    def _write(self, op: list):
+        self._apply(op)
+        # Encode right away, the records in memory may change again before a batch is flushed
+        self._pending.append(_encode(op))
+        if not self._batch_depth:
+            self._flush_pending()
+
+    def _flush_pending(self):
+        if not self._pending:
+            return
+        start = time.perf_counter()
+        if self._stale_log:
+            self._start_log()
+        header = ""
+        if self._log is None:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            self._log = open(self.log_path, "a")
+            self._log_inode = os.fstat(self._log.fileno()).st_ino
+            if os.fstat(self._log.fileno()).st_size > self._log_offset:
+                self._log.truncate(self._log_offset)
+            if not self._log_offset:
+                header = _encode(["snapshot", self._generation])
+        # Records are plain ASCII (json.dumps escapes everything else), so characters and bytes line up
+        chunk = header + "".join(self._pending)
+        self._log.write(chunk)
+        self._log.flush()
+        if not self.keep_log_open:
+            self._log.close()
+            self._log = None
+        if stats.enabled:
+            stats.record_io(self.log_path, bytes_written=len(chunk), save_s=time.perf_counter() - start)
+        self._log_offset += len(chunk)
+        self._log_ops += len(self._pending)
+        self._pending = []
+        if self._log_ops >= self.checkpoint_every and self._log_offset >= self._snapshot_bytes:
+            self.checkpoint()
+
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._flush_pending()
+
+    def flush(self):
+        self._flush_pending()
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, key: str):
+        return self.data[key]
+
+    def items(self):
+        return self.data.items()
+
+    def scan(self, after: int = 0):
+        """The cursor of a record is its position in the key list plus one, so a deletion shifts the later ones."""
+        if self._key_list is None:
+            self._key_list = list(self.data)
+        keys = self._key_list
+        # Records added while the scan is suspended are appended to the list and scanned too
+        while after < len(keys):
+            key = keys[after]
+            after += 1
+            record = self.data.get(key)
+            if record is not None:
+                yield after, key, record
+
+    def values(self):
+        return self.data.values()
+
+    def put(self, key: str, record):
+        self._write(["put", key, record])
+
+    def update(self, key: str, fields: dict):
+        self._write(["update", key, fields])
+
+    def append(self, key: str, field: str, value):
+        self._write(["append", key, field, value])
+
+    def remove(self, key: str, field: str, value):
+        self._write(["remove", key, field, value])
+
+    def delete(self, key: str):
+        self._write(["delete", key])
+
+    def checkpoint(self):
+        """
+        Write the whole collection to the snapshot file(s) and start a new, empty log.
+        Snapshots are written to a temporary file first and then atomically renamed over the old one.
+        """
+        # Pending batch records are already applied to memory and therefore part of the snapshot
+        self._pending = []
+        self._generation += 1
+        self._snapshot_bytes = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self.snapshot_format in ("json", "both"):
+            start = time.perf_counter()
+            tmp_path = _tmp_path(self.path)
+            with open(tmp_path, "w") as f:
+                f.write(json.dumps(["snapshot", self._generation]) + "\n")
+                f.write(json.dumps(self.data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._snapshot_bytes += os.path.getsize(self.path)
+            if stats.enabled:
+                stats.record_io(self.path, bytes_written=os.path.getsize(self.path),
+                                save_s=time.perf_counter() - start)
+        if self.snapshot_format in ("binary", "both"):
+            start = time.perf_counter()
+            write_binary_snapshot(self.snapshot_path, self.data, self._generation)
+            self._snapshot_bytes += os.path.getsize(self.snapshot_path)
+            if stats.enabled:
+                stats.record_io(self.snapshot_path, bytes_written=os.path.getsize(self.snapshot_path),
+                                save_s=time.perf_counter() - start)
+
+        self._start_log()
+
+    def _start_log(self):
+        """Replace the log with an empty one for the current snapshot generation."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        # The new log is a new file, so that other processes notice the checkpoint by its inode
+        header = _encode(["snapshot", self._generation])
+        tmp_path = _tmp_path(self.log_path)
+        with open(tmp_path, "w") as f:
+            f.write(header)
+            self._log_inode = os.fstat(f.fileno()).st_ino
+        os.replace(tmp_path, self.log_path)
+        self._log_ops = 0
+        self._log_offset = len(header)
+        self._stale_log = False
+
+    def close(self):
+        if self._log_ops:
+            self.checkpoint()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+
+class ShardedLogStore(Collection):
+    """
+    A collection split into one LogStore per value of a shard field, e.g. the tasks of every board in their own
+    snapshot and log files under `directory`.
+
+    A shard is only loaded when a record of it is first accessed, and only the shards that are written to append to
+    their logs, so startup and write costs depend on the shards in use rather than on the whole collection. The shard
+    of every record is kept in a small LogStore mapping ids to shard values (`_shards.json`).
+
+    Lookups with find() must include the shard field, they are answered by the indexes of that shard only.
+    """
+
+    def __init__(self, directory: str, shard_field: str, checkpoint_every: int = 1000, snapshot_format: str = "json",
+                 intern_fields: tuple = ()):
+        self.directory = directory
+        self.shard_field = shard_field
+        self.checkpoint_every = checkpoint_every
+        self.snapshot_format = snapshot_format
+        self.intern_fields = intern_fields
+        self.shard_of = LogStore(os.path.join(directory, "_shards.json"), checkpoint_every, snapshot_format)
+        self._shards = {}
+        self._index_fields = []
+        self._batch_depth = 0
+        self._batch_stack = None
+        self._batched = set()
+
+    def _shard(self, value: str) -> LogStore:
+        shard = self._shards.get(value)
+        if shard is None:
+            shard = self._shards[value] = LogStore(os.path.join(self.directory, f"{value}.json"),
+                                                   self.checkpoint_every, self.snapshot_format, self.intern_fields,
+                                                   keep_log_open=False)
+            for fields in self._index_fields:
+                shard.add_index(*fields)
+        if self._batch_depth and value not in self._batched:
+            self._batched.add(value)
+            self._batch_stack.enter_context(shard.batch())
+        return shard
+
+    def _shard_of_key(self, key: str):
+        value = self.shard_of.get(key)
+        return self._shard(value) if value is not None else None
+
+    def add_index(self, *fields: str):
+        if self.shard_field not in fields:
+            raise ValueError(f"Indexes of a sharded collection must include {self.shard_field}")
+        self._index_fields.append(fields)
+        for shard in self._shards.values():
+            shard.add_index(*fields)
+
+    def find(self, **criteria) -> list:
+        return self._shard(criteria[self.shard_field]).find(**criteria)
+
+    def get(self, key: str, default=None):
+        shard = self._shard_of_key(key)
+        return shard.get(key, default) if shard is not None else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.shard_of
+
+    def __len__(self) -> int:
+        return len(self.shard_of)
+
+    def items(self):
+        for value in dict.fromkeys(self.shard_of.values()):
+            yield from self._shard(value).items()
+
+    def put(self, key: str, record):
+        value = record[self.shard_field]
+        old_value = self.shard_of.get(key)
+        if old_value != value:
+            if old_value is not None:
+                self._shard(old_value).delete(key)
+            self.shard_of.put(key, value)
+        self._shard(value).put(key, record)
+
+    def update(self, key: str, fields: dict):
+        self._shard_of_key(key).update(key, fields)
+
+    def append(self, key: str, field: str, value):
+        self._shard_of_key(key).append(key, field, value)
+
+    def remove(self, key: str, field: str, value):
+        self._shard_of_key(key).remove(key, field, value)
+
+    def delete(self, key: str):
+        shard = self._shard_of_key(key)
+        if shard is not None:
+            shard.delete(key)
+            self.shard_of.delete(key)
+
+    @contextmanager
+    def batch(self):
+        if not self._batch_depth:
+            self._batch_stack = ExitStack()
+            self._batch_stack.enter_context(self.shard_of.batch())
+            self._batched.clear()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._batch_stack.close()
+
+    def flush(self):
+        self.shard_of.flush()
+        # Shards may be loaded by readers on another thread meanwhile
+        for shard in list(self._shards.values()):
+            shard.flush()
+
+    def checkpoint(self):
+        self.shard_of.checkpoint()
+        for shard in self._shards.values():
+            shard.checkpoint()
+
+    def refresh(self) -> bool:
+        changed = self.shard_of.refresh()
+        for shard in self._shards.values():
+            changed = shard.refresh() or changed
+        return changed
+
+    def close(self):
+        self.shard_of.close()
+        for shard in self._shards.values():
+            shard.close()
+
+
+class ListCollection:
+    """
+    Interface of a collection of lists keyed by id, that values are added to one at a time, implemented by the storage
+    backends for large lists such as the postings of a search index. Lists returned must be treated as read-only.
+    """
+
+    def get(self, key: str) -> list:
+        """The values added to a key, in the order they were added, or an empty list."""
+        pass
+
+    def add(self, key: str, value):
+        """Append a value to the list of a key, creating the list if needed."""
+        pass
+
+    def keys(self):
+        """Iterate over the keys with at least one value."""
+        pass
+
+    def __bool__(self) -> bool:
+        """Whether any value was added."""
+        pass
+
+    def batch(self):
+        """Context manager grouping the writes made inside the block into a single write."""
+        pass
+
+    def flush(self):
+        """Write the values of the current batch now, without ending the batch."""
+        pass
+
+    def checkpoint(self):
+        pass
+
+    def refresh(self) -> bool:
+        """Pick up the changes other processes committed to the storage, return whether there were any."""
+        pass
+
+    def close(self):
+        pass
+
+
+class ShardedListStore(ListCollection):
+    """
+    A ListCollection split into `shards` LogStores by a hash of the key, under `directory`. Every list is one
+    {"values": [...]} record of its shard, and adding a value appends a single log record.
+
+    A shard is only loaded when one of its keys is first accessed, so looking up a few keys loads a few shards. keys()
+    loads all of them.
+    """
+
+    def __init__(self, directory: str, shards: int = 256, checkpoint_every: int = 1000, snapshot_format: str = "json"):
+        self.directory = directory
+        self.shards = shards
+        self.checkpoint_every = checkpoint_every
+        self.snapshot_format = snapshot_format
+        self._shards = {}
+        self._batch_depth = 0
+        self._batch_stack = None
+        self._batched = set()
+
+    def _shard(self, number: int) -> LogStore:
+        shard = self._shards.get(number)
+        if shard is None:
+            shard = self._shards[number] = LogStore(os.path.join(self.directory, f"{number:02x}.json"),
+                                                    self.checkpoint_every, self.snapshot_format, keep_log_open=False)
+        if self._batch_depth and number not in self._batched:
+            self._batched.add(number)
+            self._batch_stack.enter_context(shard.batch())
+        return shard
+
+    def _shard_of_key(self, key: str) -> LogStore:
+        return self._shard(zlib.crc32(key.encode()) % self.shards)
+
+    def get(self, key: str) -> list:
+        record = self._shard_of_key(key).get(key)
+        return record["values"] if record else []
+
+    def add(self, key: str, value):
+        shard = self._shard_of_key(key)
+        if key in shard:
+            shard.append(key, "values", value)
+        else:
+            shard.put(key, {"values": [value]})
+
+    def keys(self):
+        for number in range(self.shards):
+            yield from self._shard(number).keys()
+
+    def __bool__(self) -> bool:
+        if any(self._shards.values()):
+            return True
+        return os.path.isdir(self.directory) and any(entry.name.endswith((".json", ".log", ".snap"))
+                                                     for entry in os.scandir(self.directory))
+
+    @contextmanager
+    def batch(self):
+        if not self._batch_depth:
+            self._batch_stack = ExitStack()
+            self._batched.clear()
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._batch_stack.close()
+
+    def flush(self):
+        # Shards may be loaded by readers on another thread meanwhile
+        for shard in list(self._shards.values()):
+            shard.flush()
+
+    def checkpoint(self):
+        for shard in self._shards.values():
+            shard.checkpoint()
+
+    def refresh(self) -> bool:
+        changed = False
+        for shard in self._shards.values():
+            changed = shard.refresh() or changed
+        return changed
+
+    def close(self):
+        for shard in self._shards.values():
+            shard.close()
@@ -0,0 +1,20 @@
+import re
+
+TOKEN = re.compile(r"\w+")
+# A term in the title of a task counts as much as this many occurrences in its description
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: str) -> list:
+    """The lower-cased words of a text."""
+    return TOKEN.findall(text.lower())
+
+
+def term_weights(task: dict) -> dict:
+    """Map every term of the title and description of a task to its weight in the task."""
+    weights = {}
+    for term in tokenize(task["title"]):
+        weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+    for term in tokenize(task.get("description", "")):
+        weights[term] = weights.get(term, 0) + 1
+    return weights
@@ -24,8 +24,14 @@ class TeamBase:
         pass
 
     # list all teams
-    def list_teams(self) -> str:
+    def list_teams(self, request: str = None) -> str:
         """
+        :param request: An optional json string to read the teams a page at a time, in a stable order
+        {
+          "limit" : <number of teams per page>,
+          "cursor" : "<optional, next_cursor of the previous page>"
+        }
+
         :return: A json list with the response.
         [
           {
@@ -35,6 +41,18 @@ class TeamBase:
             "admin": "<id of a user>"
           }
         ]
+        or, for a paged request
+        {
+          "teams" : [<the teams of the page, as above>],
+          "next_cursor" : "<cursor of the next page, null after the last page>"
+        }
+        """
+        pass
+
+    def stream_teams(self, chunk_size: int = 1000):
+        """
+        :return: A generator of strings that concatenate to the json list of list_teams, serialized chunk_size teams
+        at a time so that the whole list is never held in memory.
         """
         pass
 
@@ -96,6 +114,27 @@ class TeamBase:
         """
         pass
 
+    # add users to many teams at once
+    def add_users_to_teams(self, request: str):
+        """
+        :param request: A json string with the details of the teams
+        {
+          "teams" : [
+            {
+              "id" : "<team_id>",
+              "users" : ["user_id 1", "user_id2"]
+            }
+          ]
+        }
+
+        :return: A json list with the response of every team, in the order of the request
+
+        Constraint:
+        * same as add_users_to_team for every team
+        * all the teams are persisted with a single write
+        """
+        pass
+
     # add users to team
     def remove_users_from_team(self, request: str):
         """
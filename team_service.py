@@ -0,0 +1,221 @@
+import uuid
+from data_store import DataStore, read_operation, write_operation, read_page, stream_json_list
+
+class TeamService:
+    """
+    Native implementation of the team APIs of TeamBase.
+    Requests and responses are the dicts and lists described in TeamBase, so in-process callers skip the JSON
+    encoding and decoding that TeamManager does around every call.
+    """
+
+    def __init__(self, store: DataStore = None):
+        self.store = store or DataStore.default()
+        self.teams = self.store.teams
+
+    @write_operation
+    def create_team(self, data: dict) -> dict:
+        name = data.get("name")
+        if not name:
+            return {"error": "Team name is required"}
+        description = data.get("description", "")
+        if not description:
+            return {"error": "Team description is required"}
+        admin = data.get("admin")
+        if not admin:
+            return {"error": "Admin user id is required"}
+        if not isinstance(admin, str):
+            return {"error": "Admin user id must be a string"}
+        creation_time = data.get("creation_time")
+        if not creation_time:
+            return {"error": "Creation time is required"}
+
+        # Check if admin user exists
+        if admin not in self.store.users:
+            return {"error": "Admin user ID does not exist"}
+
+        if len(name) > 64 or len(description) > 128:
+            return {"error": "Name or description exceeds character limit"}
+
+        if self.store.teams.find(name=name):
+            return {"error": "Team name must be unique"}
+
+        team_id = str(uuid.uuid4())
+        self.store.teams.put(team_id, {
+            "name": name,
+            "description": description,
+            "creation_time": creation_time,
+            "admin": admin,
+            "users": [admin]
+        })
+        self.store.add_memberships(team_id, [admin])
+        self.store.response_cache.invalidate(("teams",))
+        return {"id": team_id}
+
+    @staticmethod
+    def _team_summary(team_id: str, team: dict) -> dict:
+        return {"name": team["name"], "description": team["description"],
+                "creation_time": team["creation_time"], "admin": team["admin"]}
+
+    @read_operation
+    def list_teams(self, data: dict = None):
+        if data and "limit" in data:
+            return read_page(self.teams, data, "teams", self._team_summary)
+        return [self._team_summary(team_id, team) for team_id, team in self.teams.items()]
+
+    def stream_teams(self, chunk_size: int = 1000):
+        """Yield the JSON list of list_teams in chunks of serialized text."""
+        self.store.refresh()
+        return stream_json_list(self.teams, self._team_summary, chunk_size)
+
+    @read_operation
+    def describe_team(self, data: dict) -> dict:
+        team_id = data.get("id")
+
+        if team_id not in self.teams:
+            return {"error": "Team not found"}
+
+        team = self.teams[team_id]
+        response = {
+            "name": team["name"],
+            "description": team["description"],
+            "creation_time": team["creation_time"],
+            "admin": team["admin"]
+        }
+
+        return response
+
+    @write_operation
+    def update_team(self, data: dict) -> dict:
+        team_id = data.get("id")
+        if not team_id:
+            return {"error": "Team ID is required"}
+        if not isinstance(team_id, str):
+            return {"error": "Team ID must be a string"}
+        updated_team = data.get("team", {})
+        if not updated_team:
+            return {"error": "Team details are required"}
+
+        if team_id not in self.teams:
+            return {"error": "Team not found"}
+
+        changes = {}
+        if "name" in updated_team:
+            if len(updated_team["name"]) > 64:
+                return {"error": "Name exceeds character limit"}
+            if any(other_id != team_id for other_id in self.store.teams.find(name=updated_team["name"])):
+                return {"error": "Team name must be unique"}
+            changes["name"] = updated_team["name"]
+
+        if "description" in updated_team and len(updated_team["description"]) <= 128:
+            changes["description"] = updated_team["description"]
+
+        if "admin" in updated_team:
+            admin_id = updated_team["admin"]
+            if not isinstance(admin_id, str):
+                return {"error": "Admin user id must be a string"}
+            changes["admin"] = admin_id
+
+            if admin_id not in self.teams[team_id]["users"]:
+                # Add the new admin to the team's users list if they are not already present
+                changes["users"] = self.teams[team_id]["users"] + [admin_id]
+
+        if changes:
+            self.store.teams.update(team_id, changes)
+            self.store.response_cache.invalidate(("team", team_id), ("teams",))
+        if "users" in changes:
+            self.store.add_memberships(team_id, [changes["admin"]])
+            self.store.response_cache.invalidate(("team_users", team_id))
+        return {"status": "Team updated successfully"}
+
+    @write_operation
+    def add_users_to_team(self, data: dict) -> dict:
+        team_id = data.get("id")
+        if not team_id:
+            return {"error": "Team ID is required"}
+        if not isinstance(team_id, str):
+            return {"error": "Team ID must be a string"}
+
+        users = data.get("users", [])
+        if not users:
+            return {"error": "User IDs are required"}
+        if not isinstance(users, list) or not all(isinstance(user_id, str) for user_id in users):
+            return {"error": "User IDs must be a list of strings"}
+
+        if team_id not in self.teams:
+            return {"error": "Team not found"}
+
+        if len(users) > 50:
+            return {"error": "Cannot add more than 50 users to a team"}
+
+        current_users = set(self.teams[team_id]["users"])
+
+        # Ensure total users do not exceed 50
+        if len(current_users) + len(users) > 50:
+            return {"error": "Total number of users in a team cannot exceed 50"}
+
+        self.store.teams.update(team_id, {"users": list(current_users.union(users))})
+        self.store.add_memberships(team_id, set(users) - current_users)
+        self.store.response_cache.invalidate(("team_users", team_id))
+        return {"status": "Users added successfully"}
+
+    @write_operation
+    def add_users_to_teams(self, data: dict):
+        teams = data.get("teams")
+        if not teams:
+            return {"error": "Teams are required"}
+
+        with self.store.batch():
+            return [self.add_users_to_team(team) for team in teams]
+
+    @write_operation
+    def remove_users_from_team(self, data: dict) -> dict:
+        team_id = data.get("id")
+        if not team_id:
+            return {"error": "Team ID is required"}
+        if not isinstance(team_id, str):
+            return {"error": "Team ID must be a string"}
+        users = data.get("users", [])
+        if not users:
+            return {"error": "User IDs are required"}
+        if not isinstance(users, list) or not all(isinstance(user_id, str) for user_id in users):
+            return {"error": "User IDs must be a list of strings"}
+
+        if team_id not in self.teams:
+            return {"error": "Team not found"}
+
+        current_users = set(self.teams[team_id]["users"])
+        admin_id = self.teams[team_id]["admin"]
+        users_to_remove = set(users)
+
+        # We do not want to allow removal of the admin user (assumption)
+        # If admin is in the list of users to remove, return an error message.
+        if admin_id in users_to_remove:
+            return {"error": "Admin cannot be removed from the team"}
+
+        self.store.teams.update(team_id, {"users": list(current_users - users_to_remove)})
+        self.store.remove_memberships(team_id, users_to_remove & current_users)
+        self.store.response_cache.invalidate(("team_users", team_id))
+        return {"status": "Users removed successfully"}
+
+    @read_operation
+    def list_team_users(self, data: dict):
+        team_id = data.get("id")
+
+        if team_id not in self.teams:
+            return {"error": "Team not found"}
+
+        users_data = self.store.users
+
+        # Get the set of user IDs in the team
+        team_user_ids = set(self.teams[team_id].get("users", []))
+        team_users = ((user_id, users_data.get(user_id)) for user_id in team_user_ids)
+        users_list = [
+            {
+                "id": user_id,
+                "name": user.get("name", "Unknown"),
+                "display_name": user.get("display_name", "Unknown")
+            }
+            for user_id, user in team_users if user is not None
+        ]
+
+        return users_list
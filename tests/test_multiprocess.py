@@ -0,0 +1,98 @@
+import multiprocessing
+import pytest
+from data_store import DataStore
+from user_service import UserService
+from team_service import TeamService
+from project_board_service import ProjectBoardService
+
+# The workers inherit the imported modules, and run the same code as separate server processes would
+fork = multiprocessing.get_context("fork")
+
+PROCESSES = 4
+USERS_PER_PROCESS = 100
+
+
+@pytest.fixture
+def db_dir(tmp_path):
+    return str(tmp_path / "db")
+
+
+def run_processes(target, *args, count: int = PROCESSES):
+    processes = [fork.Process(target=target, args=(i, *args)) for i in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * count
+
+
+def create_users(i: int, db_dir: str):
+    store = DataStore(db_dir, multiprocess=True)
+    users = UserService(store)
+    for k in range(USERS_PER_PROCESS):
+        assert "id" in users.create_user({"name": f"user{i}-{k}", "display_name": "U", "creation_time": "t"})
+        # Every process tries to create the same names, only one of them may succeed
+        users.create_user({"name": f"shared{k}", "display_name": "S", "creation_time": "t"})
+    store.close()
+
+
+def test_concurrent_creates_keep_names_unique(db_dir):
+    run_processes(create_users, db_dir)
+
+    names = [user["name"] for user in DataStore(db_dir).users.values()]
+    assert len(names) == len(set(names)) == (PROCESSES + 1) * USERS_PER_PROCESS
+
+
+def add_tasks(i: int, db_dir: str, user_id: str, board_id: str):
+    store = DataStore(db_dir, multiprocess=True)
+    boards = ProjectBoardService(store)
+    for k in range(USERS_PER_PROCESS):
+        response = boards.add_task({"title": f"task{i}-{k}", "description": "d", "user_id": user_id,
+                                    "board_id": board_id})
+        assert "id" in response, response
+    store.close()
+
+
+def test_concurrent_add_task_keeps_derived_data_consistent(db_dir):
+    store = DataStore(db_dir, multiprocess=True)
+    user_id = UserService(store).create_user({"name": "a", "display_name": "A", "creation_time": "t"})["id"]
+    team_id = TeamService(store).create_team({"name": "T", "description": "d", "admin": user_id,
+                                              "creation_time": "t"})["id"]
+    board_id = ProjectBoardService(store).create_board({"name": "B", "description": "d", "team_id": team_id,
+                                                         "creation_time": "t"})["id"]
+    store.close()
+
+    run_processes(add_tasks, db_dir, user_id, board_id)
+
+    store = DataStore(db_dir)
+    total = PROCESSES * USERS_PER_PROCESS
+    board = store.boards[board_id]
+    assert len(board["tasks"]) == len(set(board["tasks"])) == total
+    assert board["task_counts"]["OPEN"] == total
+    assert store.team_stats[team_id]["task_counts"]["OPEN"] == total
+    assert len(store.user_tasks[user_id]["OPEN"]) == total
+    assert len(ProjectBoardService(store).search_tasks({"query": "task", "prefix": True, "limit": total})) == total
+
+
+def create_user_and_close(i: int, db_dir: str, barrier):
+    store = DataStore(db_dir, multiprocess=True)
+    UserService(store).create_user({"name": f"closer{i}", "display_name": "C", "creation_time": "t"})
+    # All the processes close at once, each checkpoint must include the others' records
+    barrier.wait()
+    store.close()
+
+
+def test_close_keeps_the_writes_of_other_processes(db_dir):
+    first = DataStore(db_dir, multiprocess=True)
+    second = DataStore(db_dir, multiprocess=True)
+    UserService(first).create_user({"name": "first", "display_name": "F", "creation_time": "t"})
+    UserService(second).create_user({"name": "second", "display_name": "S", "creation_time": "t"})
+    second.close()
+    # A process that is still running goes on writing after another one checkpointed
+    UserService(first).create_user({"name": "third", "display_name": "T", "creation_time": "t"})
+    first.close()
+
+    run_processes(create_user_and_close, db_dir, fork.Barrier(PROCESSES))
+
+    names = {user["name"] for user in DataStore(db_dir).users.values()}
+    assert names == {"first", "second", "third"} | {f"closer{i}" for i in range(PROCESSES)}
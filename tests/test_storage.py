@@ -0,0 +1,152 @@
+import os
+import json
+import shutil
+import pytest
+from storage import LogStore, CorruptSnapshotError
+
+
+def reopen(store: LogStore, **kwargs) -> LogStore:
+    """A new store loading the files of `store`, as another process or the next start would."""
+    return LogStore(store.path, **kwargs)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "records.json")
+
+
+def write_records(store: LogStore):
+    store.put("a", {"name": "A", "tasks": ["t1"]})
+    store.put("b", {"name": "B", "tasks": []})
+    store.update("a", {"name": "A2"})
+    store.append("a", "tasks", "t2")
+    store.append("b", "tasks", "t3")
+    store.remove("a", "tasks", "t1")
+    store.delete("b")
+
+
+EXPECTED = {"a": {"name": "A2", "tasks": ["t2"]}}
+
+
+def test_log_is_replayed_on_load(path):
+    store = LogStore(path)
+    write_records(store)
+    assert not os.path.exists(path)
+    assert reopen(store).data == EXPECTED
+
+
+def test_checkpoint_folds_the_log_into_a_new_generation(path):
+    store = LogStore(path)
+    write_records(store)
+    store.checkpoint()
+    store.put("c", {"name": "C", "tasks": []})
+    loaded = reopen(store)
+    assert loaded.generation == 1
+    assert loaded.data == {**EXPECTED, "c": {"name": "C", "tasks": []}}
+
+
+def test_torn_tail_is_discarded_and_cut_off_before_the_next_write(path):
+    store = LogStore(path)
+    write_records(store)
+    with open(store.log_path, "a") as f:
+        # A whole record, but its newline was not written
+        f.write('["put","c",{"name":"C","tasks":[]}]')
+
+    loaded = reopen(store)
+    assert loaded.data == EXPECTED
+    loaded.put("d", {"name": "D", "tasks": []})
+    assert reopen(loaded).data == {**EXPECTED, "d": {"name": "D", "tasks": []}}
+
+
+def test_log_of_an_interrupted_checkpoint_is_skipped(path):
+    store = LogStore(path)
+    store.put("a", {"tasks": []})
+    store.checkpoint()
+    store.append("a", "tasks", "t1")
+    with open(store.log_path, "rb") as f:
+        old_log = f.read()
+    store.checkpoint()
+    # The checkpoint stopped after writing its snapshot, before replacing the log
+    with open(store.log_path, "wb") as f:
+        f.write(old_log)
+
+    loaded = reopen(store)
+    # Replaying the append again would duplicate it
+    assert loaded.data == {"a": {"tasks": ["t1"]}}
+    loaded.append("a", "tasks", "t2")
+    assert reopen(loaded).data == {"a": {"tasks": ["t1", "t2"]}}
+
+
+def test_legacy_snapshot_without_generation_is_loaded(path):
+    with open(path, "w") as f:
+        json.dump(EXPECTED, f)
+    store = LogStore(path)
+    assert store.generation == 0
+    assert store.data == EXPECTED
+    store.append("a", "tasks", "t4")
+    assert reopen(store).data == {"a": {"name": "A2", "tasks": ["t2", "t4"]}}
+
+
+def test_checkpoint_waits_for_the_log_to_outgrow_the_snapshot(path):
+    store = LogStore(path, checkpoint_every=1)
+    store.put("big", {"text": "x" * 10000})
+    assert store.generation == 1
+    for i in range(20):
+        store.put(f"k{i}", {"n": i})
+    assert store.generation == 1
+    while store.generation == 1:
+        store.update("big", {"text": "y" * 1000})
+    assert os.path.getsize(store.log_path) < 100
+    assert reopen(store).data["big"] == {"text": "y" * 1000}
+
+
+def corrupt(path: str):
+    with open(path, "r+b") as f:
+        f.seek(-8, os.SEEK_END)
+        f.write(b"\0" * 8)
+
+
+def test_unreadable_binary_snapshot_falls_back_to_json_of_the_same_generation(path):
+    store = LogStore(path, snapshot_format="both")
+    write_records(store)
+    store.checkpoint()
+    corrupt(store.snapshot_path)
+    assert reopen(store, snapshot_format="both").data == EXPECTED
+
+
+def test_unreadable_binary_snapshot_without_json_raises(path):
+    store = LogStore(path, snapshot_format="binary")
+    write_records(store)
+    store.checkpoint()
+    corrupt(store.snapshot_path)
+    with pytest.raises(CorruptSnapshotError):
+        reopen(store, snapshot_format="binary")
+
+
+def test_unreadable_binary_snapshot_newer_than_json_raises(path):
+    store = LogStore(path, snapshot_format="both")
+    write_records(store)
+    store.checkpoint()
+    older_json = path + ".old"
+    shutil.copy(path, older_json)
+    store.put("c", {"name": "C", "tasks": []})
+    store.checkpoint()
+    # The JSON of the previous generation, older than the binary snapshot
+    shutil.copy(older_json, path)
+    os.utime(path, ns=(0, 0))
+    corrupt(store.snapshot_path)
+    with pytest.raises(CorruptSnapshotError):
+        reopen(store, snapshot_format="both")
+
+
+def test_refresh_picks_up_the_writes_and_checkpoints_of_another_store(path):
+    reader = LogStore(path)
+    writer = LogStore(path)
+    write_records(writer)
+    assert reader.refresh()
+    assert reader.data == EXPECTED
+    writer.checkpoint()
+    writer.put("c", {"name": "C", "tasks": []})
+    assert reader.refresh()
+    assert reader.data == {**EXPECTED, "c": {"name": "C", "tasks": []}}
+    assert not reader.refresh()
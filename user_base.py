@@ -20,9 +20,38 @@ class UserBase:
         """
         pass
 
+    # create many users at once
+    def create_users(self, request: str) -> str:
+        """
+        :param request: A json string with the details of the users
+        {
+          "users" : [
+            {
+              "name" : "<user_name>",
+              "display_name" : "<display name>"
+            }
+          ]
+        }
+        :return: A json list with the response of every user, in the order of the request
+        [
+          {"id" : "<user_id>"} | {"error" : "<reason>"}
+        ]
+
+        Constraint:
+            * same as create_user for every user
+            * all the users are persisted with a single write
+        """
+        pass
+
     # list all users
-    def list_users(self) -> str:
+    def list_users(self, request: str = None) -> str:
         """
+        :param request: An optional json string to read the users a page at a time, in a stable order
+        {
+          "limit" : <number of users per page>,
+          "cursor" : "<optional, next_cursor of the previous page>"
+        }
+
         :return: A json list with the response
         [
           {
@@ -31,6 +60,18 @@ class UserBase:
             "creation_time" : "<some date:time format>"
           }
         ]
+        or, for a paged request
+        {
+          "users" : [<the users of the page, as above>],
+          "next_cursor" : "<cursor of the next page, null after the last page>"
+        }
+        """
+        pass
+
+    def stream_users(self, chunk_size: int = 1000):
+        """
+        :return: A generator of strings that concatenate to the json list of list_users, serialized chunk_size users
+        at a time so that the whole list is never held in memory.
         """
         pass
 
@@ -0,0 +1,138 @@
+import uuid
+from data_store import DataStore, read_operation, write_operation, read_page, stream_json_list
+
+class UserService:
+    """
+    Native implementation of the user APIs of UserBase.
+    Requests and responses are the dicts and lists described in UserBase, so in-process callers skip the JSON
+    encoding and decoding that UserManager does around every call.
+    """
+
+    def __init__(self, store: DataStore = None):
+        self.store = store or DataStore.default()
+        self.data = self.store.users
+
+    @write_operation
+    def create_user(self, request_data: dict) -> dict:
+        name = request_data.get("name")
+        display_name = request_data.get("display_name")
+        creation_time = request_data.get("creation_time")
+
+        if not name or len(name) > 64:
+            return {"error": "User name must be provided and be max 64 characters."}
+
+        if not display_name or len(display_name) > 64:
+            return {"error": "Display name must be provided and be max 64 characters."}
+
+        if not creation_time:
+            return {"error": "Creation time must be provided."}
+
+        # Ensure name is unique
+        if self.store.users.find(name=name):
+            return {"error": "User name must be unique."}
+
+        user_id = str(uuid.uuid4())
+
+        self.store.users.put(user_id, {
+            "name": name,
+            "display_name": display_name,
+            "creation_time": creation_time
+        })
+        self.store.response_cache.invalidate(("users",))
+
+        return {"id": user_id}
+
+    @write_operation
+    def create_users(self, request_data: dict):
+        users = request_data.get("users")
+        if not users:
+            return {"error": "Users must be provided."}
+
+        with self.store.batch():
+            return [self.create_user(user) for user in users]
+
+    @staticmethod
+    def _user_summary(user_id: str, user: dict) -> dict:
+        return {
+            "id": user_id,
+            "name": user["name"],
+            "display_name": user["display_name"],
+            "creation_time": user["creation_time"]
+        }
+
+    @read_operation
+    def list_users(self, request_data: dict = None):
+        if request_data and "limit" in request_data:
+            return read_page(self.data, request_data, "users", self._user_summary)
+        return [self._user_summary(user_id, user) for user_id, user in self.data.items()]
+
+    def stream_users(self, chunk_size: int = 1000):
+        """Yield the JSON list of list_users in chunks of serialized text."""
+        self.store.refresh()
+        return stream_json_list(self.data, self._user_summary, chunk_size)
+
+    @read_operation
+    def describe_user(self, request_data: dict) -> dict:
+        user_id = request_data.get("id")
+        if not user_id:
+            return {"error": "User ID must be provided."}
+
+        user = self.data.get(user_id)
+        if not user:
+            return {"error": "User not found."}
+
+        return {
+            "name": user["name"],
+            "display_name": user.get("display_name", "Unknown"),
+            "creation_time": user["creation_time"]
+        }
+
+    @read_operation
+    def get_user_teams(self, request_data: dict):
+        user_id = request_data.get("id")
+        if not user_id:
+            return {"error": "User ID must be provided."}
+
+        if user_id not in self.data:
+            return {"error": "User not found."}
+
+        # Only the user's own teams are read, through the user -> teams mapping
+        teams = []
+        for team_id in self.store.team_ids(user_id):
+            team = self.store.teams.get(team_id)
+            if team:
+                teams.append({
+                    "name": team["name"],
+                    "description": team["description"],
+                    "creation_time": team["creation_time"]
+                })
+        teams.sort(key=lambda team: team["name"])
+        return teams
+
+    @write_operation
+    def update_user(self, request_data: dict) -> dict:
+        user_id = request_data.get("id")
+        if not user_id:
+            return {"error": "User ID must be provided."}
+        if not isinstance(user_id, str):
+            return {"error": "User ID must be a string."}
+
+        updated_user_data = request_data.get("user")
+        if not updated_user_data:
+            return {"error": "User data must be provided."}
+
+        user = self.data.get(user_id)
+        if not user:
+            return {"error": "User not found."}
+
+        if "name" in updated_user_data:
+            return {"error": "User name cannot be updated."}
+
+        display_name = updated_user_data.get("display_name")
+        if display_name and len(display_name) > 64:
+            return {"error": "Display name must be max 64 characters."}
+
+        self.store.users.update(user_id, {"display_name": display_name})
+        self.store.response_cache.invalidate(("user", user_id), ("users",))
+
+        return dict(self.data[user_id])